@@ -0,0 +1,19 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = '3b9e1c2d4f60'
+down_revision = '716dd556fa0e'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('store_items', sa.Column('matched_at', sa.DateTime(), nullable=True))
+    op.add_column('products', sa.Column('matched_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_store_items_matched_at', 'store_items', ['matched_at'])
+    op.create_index('ix_products_matched_at', 'products', ['matched_at'])
+
+def downgrade():
+    op.drop_index('ix_products_matched_at', table_name='products')
+    op.drop_index('ix_store_items_matched_at', table_name='store_items')
+    op.drop_column('products', 'matched_at')
+    op.drop_column('store_items', 'matched_at')
@@ -0,0 +1,31 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = '8c41d7a2e915'
+down_revision = '3b9e1c2d4f60'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'latest_prices',
+        sa.Column('store_item_id', sa.Integer(), sa.ForeignKey('store_items.id'), primary_key=True),
+        sa.Column('store_id', sa.Integer(), sa.ForeignKey('stores.id'), nullable=False),
+        sa.Column('price_id', sa.Integer(), sa.ForeignKey('prices.id'), nullable=False),
+        sa.Column('price_eur', sa.Float(), nullable=False),
+        sa.Column('unit_price', sa.Float(), nullable=True),
+        sa.Column('currency', sa.String(length=8), nullable=False),
+        sa.Column('collected_at', sa.DateTime(), nullable=False),
+        sa.Column('promo_flag', sa.Boolean(), nullable=False),
+        sa.Column('promo_valid_from', sa.DateTime(), nullable=True),
+        sa.Column('promo_valid_to', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_latest_prices_store_id', 'latest_prices', ['store_id'])
+    op.create_index('ix_latest_prices_collected_at', 'latest_prices', ['collected_at'])
+    op.create_index('ix_mappings_store_item_id', 'mappings', ['store_item_id'])
+
+def downgrade():
+    op.drop_index('ix_mappings_store_item_id', table_name='mappings')
+    op.drop_index('ix_latest_prices_collected_at', table_name='latest_prices')
+    op.drop_index('ix_latest_prices_store_id', table_name='latest_prices')
+    op.drop_table('latest_prices')
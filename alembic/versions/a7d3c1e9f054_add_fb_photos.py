@@ -0,0 +1,21 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'a7d3c1e9f054'
+down_revision = 'f2c9e4a1b837'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'fb_photos',
+        sa.Column('photo_id', sa.String(length=64), primary_key=True),
+        sa.Column('slug', sa.String(length=80), nullable=True),
+        sa.Column('posted_at', sa.BigInteger(), nullable=True),
+        sa.Column('seen_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_fb_photos_slug', 'fb_photos', ['slug'])
+
+def downgrade():
+    op.drop_index('ix_fb_photos_slug', table_name='fb_photos')
+    op.drop_table('fb_photos')
@@ -0,0 +1,17 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'c3e8b5d2a916'
+down_revision = 'a7d3c1e9f054'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('fb_photos', sa.Column('outcome', sa.String(length=16), nullable=True))
+    op.add_column('fb_photos', sa.Column('n_items', sa.Integer(), nullable=True))
+    op.add_column('fb_photos', sa.Column('processed_at', sa.DateTime(), nullable=True))
+
+def downgrade():
+    op.drop_column('fb_photos', 'processed_at')
+    op.drop_column('fb_photos', 'n_items')
+    op.drop_column('fb_photos', 'outcome')
@@ -0,0 +1,17 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'd5a0f3b7c218'
+down_revision = '8c41d7a2e915'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('store_items', sa.Column('size_ml_g', sa.Integer(), nullable=True))
+    op.add_column('store_items', sa.Column('is_alt_milk', sa.Boolean(), nullable=True))
+    op.create_index('ix_store_items_cat_size', 'store_items', ['category_norm', 'size_ml_g'])
+
+def downgrade():
+    op.drop_index('ix_store_items_cat_size', table_name='store_items')
+    op.drop_column('store_items', 'is_alt_milk')
+    op.drop_column('store_items', 'size_ml_g')
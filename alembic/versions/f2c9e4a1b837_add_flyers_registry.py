@@ -0,0 +1,26 @@
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'f2c9e4a1b837'
+down_revision = 'd5a0f3b7c218'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'flyers',
+        sa.Column('sha256', sa.String(length=64), primary_key=True),
+        sa.Column('store_id', sa.Integer(), sa.ForeignKey('stores.id'), nullable=True),
+        sa.Column('source_url', sa.String(length=1024), nullable=True),
+        sa.Column('kind', sa.String(length=16), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('items', sa.JSON(), nullable=False),
+        sa.Column('valid_from', sa.DateTime(), nullable=True),
+        sa.Column('valid_to', sa.DateTime(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_flyers_store_id', 'flyers', ['store_id'])
+
+def downgrade():
+    op.drop_index('ix_flyers_store_id', table_name='flyers')
+    op.drop_table('flyers')
@@ -3,12 +3,19 @@ package com.pricecompare.data
 import com.pricecompare.data.remote.ApiService
 import com.pricecompare.data.remote.Product
 import com.pricecompare.data.remote.CompareOut
+import com.pricecompare.data.remote.BasketIn
+import com.pricecompare.data.remote.BasketItemIn
+import com.pricecompare.data.remote.BasketOut
 
 class Repo(private val api: ApiService) {
     suspend fun popular(): List<Product> = api.popularProducts()
     suspend fun listProducts(): List<Product> = api.listProducts()
     suspend fun compare(id: Int): CompareOut = api.compare(id)
 
+    // one request for the whole basket instead of compare() per product
+    suspend fun compareBasket(quantities: Map<Int, Double>): BasketOut =
+        api.compareBasket(BasketIn(quantities.map { (id, qty) -> BasketItemIn(id, qty) }))
+
     // ADD THIS FUNCTION
     suspend fun getAllProducts(): List<Product> {
         // It just needs to call your existing listProducts() function
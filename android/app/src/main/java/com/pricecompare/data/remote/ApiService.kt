@@ -1,6 +1,8 @@
 package com.pricecompare.data.remote
 
+import retrofit2.http.Body
 import retrofit2.http.GET
+import retrofit2.http.POST
 import retrofit2.http.Query
 import retrofit2.Retrofit
 import retrofit2.converter.moshi.MoshiConverterFactory
@@ -19,6 +21,9 @@ interface ApiService {
     @GET("compare")
     suspend fun compare(@Query("product_id") productId: Int): CompareOut
 
+    @POST("compare/batch")
+    suspend fun compareBasket(@Body basket: BasketIn): BasketOut
+
     companion object {
         fun build(baseUrl: String): ApiService {
             val logging = HttpLoggingInterceptor().apply {
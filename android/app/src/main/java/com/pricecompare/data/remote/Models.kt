@@ -32,3 +32,28 @@ data class CompareOut(
     val product: Product,
     val offers: List<PriceOut>
 )
+
+@JsonClass(generateAdapter = true)
+data class BasketItemIn(
+    val product_id: Int,
+    val quantity: Double = 1.0
+)
+
+@JsonClass(generateAdapter = true)
+data class BasketIn(
+    val items: List<BasketItemIn>
+)
+
+@JsonClass(generateAdapter = true)
+data class StoreTotalOut(
+    val store: String,
+    val total_eur: Double,
+    val products_found: Int,
+    val products_missing: List<Int>
+)
+
+@JsonClass(generateAdapter = true)
+data class BasketOut(
+    val results: List<CompareOut>,
+    val store_totals: List<StoreTotalOut>
+)
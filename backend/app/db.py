@@ -5,5 +5,17 @@ from .config import DATABASE_URL
 
 class Base(DeclarativeBase): pass
 
-engine = create_engine(DATABASE_URL, future=True)
+# scrapers run concurrently with their own sessions; let SQLite wait for the writer lock
+_connect_args = {"timeout": 60} if DATABASE_URL.startswith("sqlite") else {}
+engine = create_engine(DATABASE_URL, future=True, connect_args=_connect_args)
 SessionLocal = sessionmaker(bind=engine, expire_on_commit=False, autoflush=False, autocommit=False)
+
+def dialect_insert(name: str):
+    """Dialect-specific insert() (supports ON CONFLICT) for a dialect name, or None if unsupported."""
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    return None
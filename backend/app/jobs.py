@@ -1,13 +1,15 @@
 # app/jobs.py
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
 
 from .db import SessionLocal, Base, engine
-from .models import Product, StoreItem
+from .models import Product, Price, LatestPrice, StoreItem
 from .scrapers.maxi import crawl_maxi
 from .scrapers.vivafresh import crawl_vivafresh
 from .scrapers.interex_flyer import crawl_interex_flyer
@@ -16,7 +18,9 @@ from .scrapers.spar_flyer import crawl_spar_flyer
 from .scrapers.etc_flyer import crawl_etc_flyer
 from .scrapers.albi_flyer import crawl_albi_flyer
 from .config import SCRAPE_CITY
-from .utils.matching import score_item_against_product, ensure_mapping
+from .utils.matching import match_pending
+from .utils.normalize import item_attributes
+from .utils import compare_cache
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +33,16 @@ RUN_SPAR_FLYER   = os.getenv("RUN_SPAR_FLYER", "1") == "1"
 RUN_ETC_FLYER    = os.getenv("RUN_ETC_FLYER", "1") == "1"
 RUN_ALBI_FLYER   = os.getenv("RUN_ALBI_FLYER", "1") == "1"
 
+# Orchestration: how many scrapers run at once, and how long each may take (seconds).
+# Per-scraper override: SCRAPE_TIMEOUT_<NAME>, e.g. SCRAPE_TIMEOUT_ETC_FLYER=3600
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "3"))
+SCRAPE_TIMEOUT_S   = float(os.getenv("SCRAPE_TIMEOUT_S", "1800"))
+
+# Matching: refresh changed scores / drop mappings that fell below threshold.
+# Off by default so hand-backfilled mappings (see backfill_mappings.py) survive.
+MATCH_UPDATE_SCORES = os.getenv("MATCH_UPDATE_SCORES", "0") == "1"
+MATCH_PRUNE         = os.getenv("MATCH_PRUNE", "0") == "1"
+
 # --------- Initial product seeds (canonical SKUs) ----------
 ESSENTIALS = [
     {"canonical_name": "Milk 1L 2.8%", "category": "milk", "unit": "l", "brand": None, "size_ml_g": 1000, "fat_pct": 2.8},
@@ -46,75 +60,97 @@ def seed_products(db: Session) -> None:
             db.add(Product(**e))
     db.commit()
 
+def backfill_latest_prices(db: Session) -> None:
+    """One-off fill of latest_prices from the price history (the Price write hooks keep it current after)."""
+    if db.query(LatestPrice.store_item_id).first() is not None:
+        return
+    ranked = select(
+        Price.id, Price.store_item_id, Price.store_id, Price.price_eur, Price.unit_price, Price.currency,
+        Price.collected_at, Price.promo_flag, Price.promo_valid_from, Price.promo_valid_to,
+        func.row_number().over(
+            partition_by=Price.store_item_id,
+            order_by=(Price.collected_at.desc(), Price.id.desc()),
+        ).label("rn"),
+    ).subquery()
+    cols = ["price_id", "store_item_id", "store_id", "price_eur", "unit_price", "currency",
+            "collected_at", "promo_flag", "promo_valid_from", "promo_valid_to"]
+    src = select(*[c for c in ranked.c if c.name != "rn"]).where(ranked.c.rn == 1)
+    db.execute(insert(LatestPrice).from_select(cols, src))
+    db.commit()
+
+def backfill_item_attributes(db: Session) -> None:
+    """Derive size/fat/category/alt-milk columns for items ingested before they existed."""
+    pending = db.query(StoreItem).filter(StoreItem.is_alt_milk.is_(None)).all()
+    for it in pending:
+        for k, v in item_attributes(it.raw_name).items():
+            setattr(it, k, v)
+    if pending:
+        db.commit()
+        logger.info("[items] derived attributes for %d store items", len(pending))
+
 # --------- Main scrape orchestration ----------
+SCRAPERS = [
+    ("maxi",       RUN_MAXI,       crawl_maxi),
+    ("vivafresh",  RUN_VIVAFRESH,  crawl_vivafresh),
+    ("interex",    RUN_INTEREX,    crawl_interex_flyer),
+    ("spar-flyer", RUN_SPAR_FLYER, crawl_spar_flyer),
+    ("spar-wolt",  RUN_SPAR_WOLT,  crawl_spar_wolt),
+    ("etc-flyer",  RUN_ETC_FLYER,  crawl_etc_flyer),
+    ("albi",       RUN_ALBI_FLYER, crawl_albi_flyer),
+]
+
+def _timeout_for(name: str) -> float:
+    return float(os.getenv(f"SCRAPE_TIMEOUT_{name.upper().replace('-', '_')}", SCRAPE_TIMEOUT_S))
+
+async def _run_scraper(name: str, crawl, sem: asyncio.Semaphore) -> None:
+    """
+    One scraper, one Session. Failures and timeouts are logged, never raised, so a slow
+    or broken store can't hold up the others. The timeout cancels the crawl at its next
+    await; work already handed to a worker thread is not interrupted (anyio waits for it
+    to return), and such threads open their own Session rather than sharing this one.
+    """
+    async with sem:
+        db = SessionLocal()
+        started = asyncio.get_running_loop().time()
+        try:
+            await asyncio.wait_for(crawl(db, SCRAPE_CITY), timeout=_timeout_for(name))
+            logger.info("[%s] done in %.0fs", name, asyncio.get_running_loop().time() - started)
+        except asyncio.TimeoutError:
+            db.rollback()
+            logger.error("[%s] timed out after %gs", name, _timeout_for(name))
+        except Exception:
+            db.rollback()
+            logger.exception("[%s] failed", name)
+        finally:
+            db.close()
+
 async def run_all_scrapers():
     db = SessionLocal()
     try:
         Base.metadata.create_all(engine)
         seed_products(db)
-
-        if RUN_MAXI:
-            try:
-                await crawl_maxi(db, SCRAPE_CITY)
-            except Exception:
-                db.rollback()
-                logger.exception("[maxi] failed")
-
-        if RUN_VIVAFRESH:
-            try:
-                await crawl_vivafresh(db, SCRAPE_CITY)
-            except Exception:
-                db.rollback()
-                logger.exception("[vivafresh] failed")
-
-        if RUN_INTEREX:
-            try:
-                await crawl_interex_flyer(db, SCRAPE_CITY)
-            except Exception:
-                db.rollback()
-                logger.exception("[interex] failed")
-
-        if RUN_SPAR_FLYER:
-            try:
-                await crawl_spar_flyer(db, SCRAPE_CITY)
-            except Exception:
-                db.rollback()
-                logger.exception("[spar-flyer] failed")
-
-        if RUN_SPAR_WOLT:
-            try:
-                await crawl_spar_wolt(db, SCRAPE_CITY)
-            except Exception:
-                db.rollback()
-                logger.exception("[spar-wolt] failed")
-        
-        if RUN_ETC_FLYER:
-            try:
-                await crawl_etc_flyer(db, SCRAPE_CITY)
-            except Exception:
-                db.rollback()
-                logger.exception("[etc-flyer] failed")
-        
-        if RUN_ALBI_FLYER:
-            try:
-                await crawl_albi_flyer(db, SCRAPE_CITY)
-            except Exception:
-                db.rollback()
-                logger.exception("[albi] failed")
-
-
-        # ----- Auto-match scraped StoreItems to canonical Products -----
-        prods = db.query(Product).all()
-        items = db.query(StoreItem).all()
-
-        for it in items:
-            for p in prods:
-                score = score_item_against_product(it.raw_name, p)
-                ensure_mapping(db, p, it, score, threshold=0.75)  # ✅ Tightened threshold
-
+        backfill_latest_prices(db)
+        backfill_item_attributes(db)
+
+        # every enabled scraper runs as its own task; gather() is the barrier before matching
+        sem = asyncio.Semaphore(max(1, SCRAPE_CONCURRENCY))
+        await asyncio.gather(*(
+            _run_scraper(name, crawl, sem)
+            for name, enabled, crawl in SCRAPERS
+            if enabled
+        ))
+
+        # ----- Auto-match new/renamed StoreItems and new Products -----
+        written, deleted = match_pending(
+            db, threshold=0.75,  # ✅ Tightened threshold
+            update_scores=MATCH_UPDATE_SCORES, prune=MATCH_PRUNE,
+        )
         db.commit()
+        logger.info("[match] wrote %d mappings, pruned %d", written, deleted)
 
     finally:
+        # scrapers commit as they go, so even a failed pass may have new prices
+        compare_cache.invalidate()
         db.close()
 
 # --------- Scheduler ----------
@@ -3,10 +3,11 @@ from datetime import datetime
 from typing import List, Optional
 
 from sqlalchemy import (
-    String, Integer, Float, ForeignKey, DateTime, Boolean, UniqueConstraint, Index, func, Column
+    String, Integer, BigInteger, Float, ForeignKey, DateTime, Boolean, UniqueConstraint, Index, func, Column, event, JSON,
+    update, insert, select
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from .db import Base
+from .db import Base, dialect_insert
 
 class Store(Base):
     __tablename__ = "stores"
@@ -28,6 +29,8 @@ class Product(Base):
     size_ml_g: Mapped[Optional[int]] = mapped_column(Integer)
     fat_pct: Mapped[Optional[float]] = mapped_column(Float)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # last auto-match pass that scored this product (NULL = new/changed, needs a pass)
+    matched_at: Mapped[Optional[datetime]] = mapped_column(DateTime, index=True)
 
 class StoreItem(Base):
     __tablename__ = "store_items"
@@ -48,13 +51,23 @@ class StoreItem(Base):
     fat_pct: Mapped[Optional[float]] = mapped_column(Float)
     # --- END ADDITIONS ---
 
+    # parsed from raw_name at ingest (utils.normalize.item_attributes); NULL is_alt_milk = not derived yet
+    size_ml_g: Mapped[Optional[int]] = mapped_column(Integer)
+    is_alt_milk: Mapped[Optional[bool]] = mapped_column(Boolean)
+
+    # last auto-match pass that scored this item (NULL = new/renamed, needs a pass)
+    matched_at: Mapped[Optional[datetime]] = mapped_column(DateTime, index=True)
+
     store: Mapped["Store"] = relationship(back_populates="store_items")
     prices: Mapped[List["Price"]] = relationship(
         back_populates="store_item", cascade="all, delete-orphan"
     )
     mappings: Mapped[List["Mapping"]] = relationship(back_populates="item")
 
-    __table_args__ = (Index("ix_store_external", "store_id", "external_id"),)
+    __table_args__ = (
+        Index("ix_store_external", "store_id", "external_id"),
+        Index("ix_store_items_cat_size", "category_norm", "size_ml_g"),
+    )
 
 class Price(Base):
     __tablename__ = "prices"
@@ -85,10 +98,111 @@ class Mapping(Base):
     __tablename__ = "mappings"
     id: Mapped[int] = mapped_column(primary_key=True)
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
-    store_item_id: Mapped[int] = mapped_column(ForeignKey("store_items.id"))
+    store_item_id: Mapped[int] = mapped_column(ForeignKey("store_items.id"), index=True)
     match_score: Mapped[float] = mapped_column(Float)
 
     product: Mapped["Product"] = relationship()
     item: Mapped["StoreItem"] = relationship(back_populates="mappings")
 
     __table_args__ = (UniqueConstraint("product_id", "store_item_id"),)
+
+class LatestPrice(Base):
+    """Newest Price row per StoreItem, kept current by the Price insert/update hooks below."""
+    __tablename__ = "latest_prices"
+
+    store_item_id: Mapped[int] = mapped_column(ForeignKey("store_items.id"), primary_key=True)
+    store_id: Mapped[int] = mapped_column(ForeignKey("stores.id"), index=True)
+    price_id: Mapped[int] = mapped_column(ForeignKey("prices.id"))
+
+    price_eur: Mapped[float] = mapped_column(Float)
+    unit_price: Mapped[Optional[float]] = mapped_column(Float)
+    currency: Mapped[str] = mapped_column(String(8), default="€")
+    collected_at: Mapped[datetime] = mapped_column(DateTime, index=True)
+
+    promo_flag: Mapped[bool] = mapped_column(Boolean, default=False)
+    promo_valid_from: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    promo_valid_to: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    store_item: Mapped["StoreItem"] = relationship()
+    store: Mapped["Store"] = relationship()
+
+class Flyer(Base):
+    """A flyer PDF/image seen by a scraper, keyed by the SHA-256 of its bytes, with its parse result."""
+    __tablename__ = "flyers"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    store_id: Mapped[Optional[int]] = mapped_column(ForeignKey("stores.id"), index=True)
+    source_url: Mapped[Optional[str]] = mapped_column(String(1024))
+    kind: Mapped[str] = mapped_column(String(16))     # "pdf" | "image"
+    status: Mapped[str] = mapped_column(String(16))   # "parsed" | "rejected"
+    items: Mapped[list] = mapped_column(JSON, default=list)  # parse_text_for_items() output
+    valid_from: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    valid_to: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    processed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+class FbPhoto(Base):
+    """A Facebook photo seen by the flyer scrapers, keyed by its photo id (fbid)."""
+    __tablename__ = "fb_photos"
+
+    photo_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    slug: Mapped[Optional[str]] = mapped_column(String(80), index=True)
+    posted_at: Mapped[Optional[int]] = mapped_column(BigInteger)  # publish time, UTC epoch seconds
+    seen_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # ledger: set once the photo went through download/OCR ("items" | "greeting" | "pre-no-text" | ...)
+    outcome: Mapped[Optional[str]] = mapped_column(String(16))
+    n_items: Mapped[Optional[int]] = mapped_column(Integer)
+    processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+
+# --- Match watermarks: anything that changes a match score re-queues the row ---
+@event.listens_for(StoreItem.raw_name, "set")
+def _requeue_renamed_item(target, value, oldvalue, initiator):
+    if value != oldvalue:
+        target.matched_at = None
+
+def _requeue_changed_product(target, value, oldvalue, initiator):
+    if value != oldvalue:
+        target.matched_at = None
+
+for _attr in (Product.category, Product.brand, Product.size_ml_g, Product.fat_pct):
+    event.listen(_attr, "set", _requeue_changed_product)
+
+
+# --- latest_prices: upsert on every Price write, never replacing a newer row ---
+@event.listens_for(Price, "after_insert")
+@event.listens_for(Price, "after_update")
+def _sync_latest_price(mapper, connection, target):
+    values = {
+        "store_item_id": target.store_item_id,
+        "store_id": target.store_id,
+        "price_id": target.id,
+        "price_eur": target.price_eur,
+        "unit_price": target.unit_price,
+        "currency": target.currency or "€",
+        "collected_at": target.collected_at or datetime.utcnow(),
+        "promo_flag": bool(target.promo_flag),
+        "promo_valid_from": target.promo_valid_from,
+        "promo_valid_to": target.promo_valid_to,
+    }
+    newer = LatestPrice.collected_at <= values["collected_at"]
+
+    dialect_ins = dialect_insert(connection.dialect.name)
+    if dialect_ins is not None:
+        stmt = dialect_ins(LatestPrice).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["store_item_id"],
+            set_={k: stmt.excluded[k] for k in values if k != "store_item_id"},
+            where=newer,
+        )
+        connection.execute(stmt)
+        return
+
+    res = connection.execute(
+        update(LatestPrice).where(LatestPrice.store_item_id == target.store_item_id, newer).values(**values)
+    )
+    if not res.rowcount:
+        have = connection.execute(
+            select(LatestPrice.store_item_id).where(LatestPrice.store_item_id == target.store_item_id)
+        ).first()
+        if not have:
+            connection.execute(insert(LatestPrice).values(**values))
@@ -2,11 +2,12 @@
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session, aliased
-from sqlalchemy import func, and_, desc, select, literal_column, or_, asc, true, not_, exists
+from sqlalchemy import func, and_, select, or_, asc, true, not_, exists, literal, union_all
 
 from ..db import SessionLocal
-from ..models import Product, Mapping, StoreItem, Price, Store
-from ..schemas import CompareOut, ProductOut, PriceOut
+from ..models import Product, Mapping, StoreItem, LatestPrice, Store
+from ..schemas import CompareOut, ProductOut, PriceOut, BasketIn, BasketOut, StoreTotalOut
+from ..utils import compare_cache
 
 router = APIRouter(prefix="/compare", tags=["compare"])
 
@@ -22,176 +23,198 @@ def get_db():
         db.close()
 
 
-@router.get("", response_model=CompareOut)
-def compare_prices(
-    product_id: int = Query(..., ge=1),
-    db: Session = Depends(get_db),
-):
-    prod = db.get(Product, product_id)
-    if not prod:
-        raise HTTPException(status_code=404, detail="Product not found")
-
-    # --- Resilient Query with OUTER JOIN replacement via EXISTS and Robust Name-Based Fallback ---
-
-    # 1. Alias the tables
-    P = aliased(Price)
-    SI = aliased(StoreItem)
-    S = aliased(Store)
-    M = aliased(Mapping)  # Alias for Mapping
-
-    # --- Fallback Heuristics (unchanged structure, reused below) ---
-    name_lower = func.lower(SI.raw_name)
-
-    # milk-like tokens
-    is_milkish = or_(
-        name_lower.like("%qum%"),  # Covers "qumesht" variations
-        name_lower.like("%milk%")
-    )
-
-    # 1L variations
-    is_1l = or_(
-        name_lower.like("%1l%"),
-        name_lower.like("%1 l%"),
-        name_lower.like("%1000ml%"),
-        name_lower.like("%1000 ml%")
-    )
-
-    # 250g variations (butter)
-    is_250g = or_(
-        name_lower.like("%250g%"),
-        name_lower.like("%250 g%"),
-        name_lower.like("%250gr%"),
-        name_lower.like("%250 gr%")
-    )
-
-    # Fat % guard (handles comma/dot)
+def _fallback_condition(prod: Product, SI):
+    """
+    Match for store items that have no mappings at all.
+    Filters on the columns item_attributes() derives at ingest (indexed category_norm + size_ml_g)
+    instead of LIKE-scanning raw_name.
+    """
+    # Fat % guard (±0.3 absorbs 2.8 vs 2,8 vs 3% rounding)
     fat_ok = true()  # Assume OK if product has no fat % specified
     if prod.fat_pct:
-        fat_str_comma = f"%{str(prod.fat_pct).replace('.', ',')}%"
-        fat_str_dot = f"%{str(prod.fat_pct).replace(',', '.')}%"
-
-        fat_ok = or_(
-            SI.fat_pct.between(prod.fat_pct - 0.3, prod.fat_pct + 0.3),
-            name_lower.like(fat_str_comma),
-            name_lower.like(fat_str_dot),
-        )
-
-    # Exclude alternative milks
-    exclude_alt_milk = or_(
-        name_lower.like("%soja%"), name_lower.like("%soya%"),
-        name_lower.like("%badem%"), name_lower.like("%almond%"),
-        name_lower.like("%oriz%"),  name_lower.like("%rice%"),
-        name_lower.like("%oat%"),   name_lower.like("%tersh%"),
-        name_lower.like("%kokos%"), name_lower.like("%coco%"),
-        name_lower.like("%dhie%"),  name_lower.like("%goat%")
-    )
+        fat_ok = SI.fat_pct.between(prod.fat_pct - 0.3, prod.fat_pct + 0.3)
 
     # Category-specific fallback
     fallback_condition = true()
     if prod.category == 'milk' and prod.size_ml_g and 900 <= prod.size_ml_g <= 1100:
-        fallback_condition = and_(is_milkish, is_1l, fat_ok, not_(exclude_alt_milk))
+        fallback_condition = and_(
+            SI.category_norm == 'milk',
+            SI.size_ml_g == 1000,
+            fat_ok,
+            SI.is_alt_milk.is_(False),  # exclude soy/almond/oat/goat...
+        )
     elif prod.category == 'butter' and prod.size_ml_g == 250:
-        fallback_condition = and_(name_lower.like('%gjalp%'), is_250g)
+        fallback_condition = and_(SI.category_norm == 'butter', SI.size_ml_g == 250)
     # Extend with more categories as needed (yogurt, cheese, etc.)
 
-    # ----- Stage A: latest-price-per-item with robust mapping/fallback -----
-    # exists() helpers
+    return fallback_condition
+
+
+def _best_per_store_select(prod: Product, L, SI, M):
+    """
+    Stage A: latest price per item (latest_prices) with robust mapping/fallback, ranked per store.
+    The literal product id lets several products share one UNION ALL query.
+    """
+    # exists() helpers (both hit the mappings indexes)
     mapping_exists_for_product = exists(
-        select(M.id).where(and_(M.store_item_id == SI.id, M.product_id == product_id))
+        select(M.id).where(and_(M.store_item_id == SI.id, M.product_id == prod.id))
     )
     mapping_exists_any = exists(select(M.id).where(M.store_item_id == SI.id))
 
-    subq_latest_per_item = (
+    best_order = (L.unit_price.is_(None), L.unit_price.asc(), L.price_eur.asc(), L.collected_at.desc())
+    return (
         select(
-            P.id.label("price_id"),
-            P.store_id.label("store_id"),
-            P.unit_price.label("unit_price"),
-            P.price_eur.label("price_eur"),
-            P.collected_at.label("collected_at"),
-            func.row_number().over(
-                partition_by=P.store_item_id,
-                order_by=P.collected_at.desc(),
-            ).label("rn_item"),
+            literal(prod.id).label("product_id"),
+            L.store_item_id.label("store_item_id"),
+            func.row_number().over(partition_by=L.store_id, order_by=best_order).label("rn_store"),
         )
-        .join(SI, SI.id == P.store_item_id)
-        .filter(
+        .join(SI, SI.id == L.store_item_id)
+        .where(
             or_(
                 # Explicit mapping to the requested product
                 mapping_exists_for_product,
                 # Or: no mappings at all AND fallback matches
-                and_(not_(mapping_exists_any), fallback_condition),
+                and_(not_(mapping_exists_any), _fallback_condition(prod, SI)),
             )
         )
-        .filter(P.collected_at >= func.date('now', f'-{RECENT_DAYS} days'))
-    ).subquery()
+        .where(L.collected_at >= func.date('now', f'-{RECENT_DAYS} days'))
+    )
+
+
+def _compare_many(db: Session, prods: list[Product]) -> dict[int, CompareOut]:
+    """Best offer per store for each product, in a single round trip."""
+    # --- Resilient Query with OUTER JOIN replacement via EXISTS and Robust Name-Based Fallback ---
+    L = aliased(LatestPrice)
+    SI = aliased(StoreItem)
+    S = aliased(Store)
+    M = aliased(Mapping)  # Alias for Mapping
+
+    selects = [_best_per_store_select(p, L, SI, M) for p in prods]
+    subq_best_per_store = (union_all(*selects) if len(selects) > 1 else selects[0]).subquery()
 
     # ----- Stage B: single best offer per store (null unit_price last) -----
-    subq_best_per_store = (
-        select(
-            subq_latest_per_item.c.price_id,
-            func.row_number().over(
-                partition_by=subq_latest_per_item.c.store_id,
-                order_by=(
-                    subq_latest_per_item.c.unit_price.is_(None),
-                    subq_latest_per_item.c.unit_price.asc(),
-                    subq_latest_per_item.c.price_eur.asc(),
-                    subq_latest_per_item.c.collected_at.desc(),
-                ),
-            ).label("rn_store"),
-        )
-        .where(subq_latest_per_item.c.rn_item == 1)
-    ).subquery()
-
-    # 3. Main query: rows where rn_store = 1
-    q = (
-        db.query(P, S, SI)
-        .join(subq_best_per_store, and_(P.id == subq_best_per_store.c.price_id, subq_best_per_store.c.rn_store == 1))
-        .join(SI, SI.id == P.store_item_id)
-        .join(S, S.id == P.store_id)
+    rows = (
+        db.query(subq_best_per_store.c.product_id, L, S, SI)
+        .join(L, L.store_item_id == subq_best_per_store.c.store_item_id)
+        .join(SI, SI.id == L.store_item_id)
+        .join(S, S.id == L.store_id)
+        .filter(subq_best_per_store.c.rn_store == 1)
         .order_by(
-            P.unit_price.is_(None),
-            asc(P.unit_price),
-            asc(P.price_eur),
+            subq_best_per_store.c.product_id,
+            L.unit_price.is_(None),
+            asc(L.unit_price),
+            asc(L.price_eur),
             asc(S.name),
         )
+        .all()
     )
 
-    rows = q.all()
-
-    offers: list[PriceOut] = []
-    seen_store_item = set()
-    for price_obj, store, item in rows:
-        store_item_key = (store.id, item.id)
-        if store_item_key in seen_store_item:
-            continue
-        seen_store_item.add(store_item_key)
-
-        offers.append(
+    offers: dict[int, list[PriceOut]] = {p.id: [] for p in prods}
+    for product_id, latest, store, item in rows:
+        offers[product_id].append(
             PriceOut(
                 store=store.name,
                 raw_name=item.raw_name,
                 url=item.url,
-                price_eur=price_obj.price_eur,
-                unit_price=price_obj.unit_price,
-                currency=price_obj.currency,
-                collected_at=price_obj.collected_at,
-                promo=price_obj.promo_flag,
+                price_eur=latest.price_eur,
+                unit_price=latest.unit_price,
+                currency=latest.currency,
+                collected_at=latest.collected_at,
+                promo=latest.promo_flag,
+                promo_valid_from=latest.promo_valid_from,
+                promo_valid_to=latest.promo_valid_to,
             )
         )
 
-    print(f"DEBUG: Found {len(offers)} offers for product_id {product_id}")
-    if not offers:
+    return {
+        p.id: CompareOut(
+            product=ProductOut(
+                id=p.id,
+                canonical_name=p.canonical_name,
+                category=p.category,
+                unit=p.unit,
+                brand=p.brand,
+                size_ml_g=p.size_ml_g,
+                fat_pct=p.fat_pct,
+            ),
+            offers=offers[p.id],
+        )
+        for p in prods
+    }
+
+
+@router.get("", response_model=CompareOut)
+def compare_prices(
+    product_id: int = Query(..., ge=1),
+    db: Session = Depends(get_db),
+):
+    cached, gen = compare_cache.get(product_id)
+    if cached is not None:
+        return cached
+
+    prod = db.get(Product, product_id)
+    if not prod:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    out = _compare_many(db, [prod])[product_id]
+
+    print(f"DEBUG: Found {len(out.offers)} offers for product_id {product_id}")
+    if not out.offers:
         print(f"DEBUG: Query for product_id {product_id} returned no results matching the filter OR fallback.")
 
-    return CompareOut(
-        product=ProductOut(
-            id=prod.id,
-            canonical_name=prod.canonical_name,
-            category=prod.category,
-            unit=prod.unit,
-            brand=prod.brand,
-            size_ml_g=prod.size_ml_g,
-            fat_pct=prod.fat_pct,
-        ),
-        offers=offers,
+    compare_cache.put(product_id, out, gen)
+    return out
+
+
+@router.post("/batch", response_model=BasketOut)
+def compare_basket(basket: BasketIn, db: Session = Depends(get_db)):
+    """
+    Compare a whole basket: per-product offers plus per-store totals (price × quantity).
+    Cached products are served from compare_cache; the rest share one query.
+    """
+    quantities: dict[int, float] = {}
+    for it in basket.items:
+        quantities[it.product_id] = quantities.get(it.product_id, 0) + it.quantity
+
+    results: dict[int, CompareOut] = {}
+    misses: dict[int, int | None] = {}   # product id -> cache generation seen by get()
+    for pid in quantities:
+        cached, gen = compare_cache.get(pid)
+        if cached is not None:
+            results[pid] = cached
+        else:
+            misses[pid] = gen
+
+    if misses:
+        prods = db.query(Product).filter(Product.id.in_(list(misses))).all()
+        missing = set(misses) - {p.id for p in prods}
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Products not found: {sorted(missing)}")
+        for pid, out in _compare_many(db, prods).items():
+            compare_cache.put(pid, out, misses[pid])
+            results[pid] = out
+
+    # per-store totals over the products each store actually offers
+    totals: dict[str, dict] = {}
+    for pid, out in results.items():
+        for offer in out.offers:
+            t = totals.setdefault(offer.store, {"total_eur": 0.0, "found": set()})
+            t["total_eur"] += offer.price_eur * quantities[pid]
+            t["found"].add(pid)
+
+    store_totals = [
+        StoreTotalOut(
+            store=store,
+            total_eur=round(t["total_eur"], 2),
+            products_found=len(t["found"]),
+            products_missing=sorted(set(quantities) - t["found"]),
+        )
+        for store, t in totals.items()
+    ]
+    # complete baskets first, then cheapest
+    store_totals.sort(key=lambda x: (len(x.products_missing), x.total_eur, x.store))
+
+    return BasketOut(
+        results=[results[pid] for pid in quantities],
+        store_totals=store_totals,
     )
@@ -5,6 +5,7 @@ from sqlalchemy import func
 
 from ..db import SessionLocal
 from ..models import StoreItem, Price, Store
+from ..utils import compare_cache, ocr_cache
 
 router = APIRouter(prefix="/debug", tags=["debug"])
 RECENT_DAYS = 14
@@ -34,3 +35,8 @@ def store_counts(db: Session = Depends(get_db)):
 
     names = {s.id: s.name for s in db.query(Store).all()}
     return [{"store": names.get(sid, sid), "n": n} for sid, n in rows]
+
+
+@router.get("/cache_stats")
+def cache_stats():
+    return {"compare": compare_cache.stats(), "ocr": ocr_cache.stats()}
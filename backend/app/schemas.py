@@ -1,7 +1,7 @@
 # backend/app/schemas.py
 from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 class ProductOut(BaseModel):
     id: int
@@ -30,3 +30,20 @@ class CompareOut(BaseModel):
     product: ProductOut
     offers: List[PriceOut]
     model_config = ConfigDict(from_attributes=True)
+
+class BasketItemIn(BaseModel):
+    product_id: int = Field(..., ge=1)
+    quantity: float = Field(1.0, gt=0)
+
+class BasketIn(BaseModel):
+    items: List[BasketItemIn] = Field(..., min_length=1, max_length=200)
+
+class StoreTotalOut(BaseModel):
+    store: str
+    total_eur: float
+    products_found: int
+    products_missing: List[int]
+
+class BasketOut(BaseModel):
+    results: List[CompareOut]
+    store_totals: List[StoreTotalOut]
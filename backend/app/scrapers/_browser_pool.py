@@ -0,0 +1,119 @@
+# backend/app/scrapers/_browser_pool.py
+# Long-lived Playwright browsers shared by the headless scrapers.
+# Playwright's sync API is bound to the thread that started it, so each worker thread owns one
+# sync_playwright() instance plus its warm browsers (one per launch-args set). Jobs are queued
+# to the workers and receive a browser to open their own isolated context on, so a task costs
+# a new context instead of a Chromium launch. BROWSER_POOL_SIZE sets the number of workers.
+from __future__ import annotations
+
+import asyncio
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Sequence
+
+logger = logging.getLogger(__name__)
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+DEFAULT_LAUNCH_ARGS: tuple[str, ...] = ()
+
+_jobs: "queue.Queue[tuple | None]" = queue.Queue()
+_workers: list[threading.Thread] = []
+_lock = threading.Lock()
+_in_worker = threading.local()
+
+
+def _worker_main() -> None:
+    if sys.platform == "win32":
+        try:
+            asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+        except Exception:
+            pass
+    _in_worker.active = True
+
+    pw, start_error = None, None
+    try:
+        from playwright.sync_api import sync_playwright
+        pw = sync_playwright().start()
+    except Exception as e:  # keep serving the queue so callers get the error instead of hanging
+        start_error = e
+        logger.error("[browser-pool] playwright failed to start: %s", e)
+
+    browsers: dict[tuple[str, ...], Any] = {}
+    try:
+        while True:
+            job = _jobs.get()
+            if job is None:
+                break
+            fut, fn, args, kwargs, launch_args = job
+            if not fut.set_running_or_notify_cancel():
+                continue
+            if start_error is not None:
+                fut.set_exception(start_error)
+                continue
+            try:
+                browser = browsers.get(launch_args)
+                if browser is None or not browser.is_connected():
+                    browser = pw.chromium.launch(headless=True, args=list(launch_args))
+                    browsers[launch_args] = browser
+                    logger.info("[browser-pool] %s launched chromium %s",
+                                threading.current_thread().name, list(launch_args))
+                fut.set_result(fn(browser, *args, **kwargs))
+            except BaseException as e:
+                fut.set_exception(e)
+            finally:
+                # jobs own their contexts; drop any a failed job left open
+                for b in browsers.values():
+                    for ctx in list(b.contexts) if b.is_connected() else []:
+                        try:
+                            ctx.close()
+                        except Exception:
+                            pass
+    finally:
+        for b in browsers.values():
+            try:
+                b.close()
+            except Exception:
+                pass
+        if pw is not None:
+            pw.stop()
+
+
+def _ensure_started() -> None:
+    with _lock:
+        _workers[:] = [w for w in _workers if w.is_alive()]
+        while len(_workers) < max(1, BROWSER_POOL_SIZE):
+            w = threading.Thread(target=_worker_main, name=f"browser-pool-{len(_workers)}", daemon=True)
+            w.start()
+            _workers.append(w)
+
+
+def run(fn: Callable[..., Any], *args, launch_args: Sequence[str] = DEFAULT_LAUNCH_ARGS, **kwargs) -> Any:
+    """
+    Run fn(browser, *args, **kwargs) on a pool worker and block until it returns.
+    fn should open (and close) its own context; it must not call run() itself.
+    """
+    if getattr(_in_worker, "active", False):
+        raise RuntimeError("browser_pool.run() called from a pool worker")
+    _ensure_started()
+    fut: Future = Future()
+    _jobs.put((fut, fn, args, kwargs, tuple(launch_args)))
+    return fut.result()
+
+
+def shutdown(timeout: float = 10.0) -> None:
+    """Close the browsers and stop the workers (registered with atexit)."""
+    with _lock:
+        workers = list(_workers)
+        _workers.clear()
+    for _ in workers:
+        _jobs.put(None)
+    for w in workers:
+        w.join(timeout)
+
+
+atexit.register(shutdown)
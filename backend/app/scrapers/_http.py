@@ -0,0 +1,210 @@
+# backend/app/scrapers/_http.py
+# Shared httpx helpers for the scrapers: per-host rate limiting, retry with backoff and an
+# on-disk conditional-GET cache.
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from dataclasses import dataclass
+
+import httpx
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+HTTP_CACHE = os.getenv("HTTP_CACHE", "1") == "1"
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", ".http_cache")
+# an unchanged body is still re-processed once it was last processed this long ago, so the
+# latest price rows keep getting refreshed for pages that never change
+HTTP_CACHE_REPROCESS_H = float(os.getenv("HTTP_CACHE_REPROCESS_H", "20"))
+# entries not fetched for this long (delisted/renamed URLs) are deleted when a cache is opened
+HTTP_CACHE_MAX_AGE_D = float(os.getenv("HTTP_CACHE_MAX_AGE_D", "14"))
+
+
+class HostRateLimiter:
+    """Spaces request starts so each host sees at most `rps` requests per second."""
+
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps if rps > 0 else 0.0
+        self._next: dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, host: str) -> None:
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            start = max(now, self._next.get(host, now))
+            self._next[host] = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+async def get_with_retry(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    limiter: HostRateLimiter | None = None,
+    retries: int = 3,
+    backoff: float = 0.7,
+    **kw,
+) -> httpx.Response:
+    """
+    GET with retries on connection errors, 429 and 5xx (exponential backoff + jitter,
+    Retry-After honoured). The last response/exception is returned/raised as-is.
+    """
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            await limiter.wait(httpx.URL(url).host or client.base_url.host)
+        try:
+            resp = await client.get(url, **kw)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RemoteProtocolError):
+            if attempt == retries:
+                raise
+            await asyncio.sleep(backoff * (2 ** attempt) + random.uniform(0, backoff))
+            continue
+        if resp.status_code not in RETRY_STATUSES or attempt == retries:
+            return resp
+        delay = backoff * (2 ** attempt) + random.uniform(0, backoff)
+        retry_after = resp.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        await asyncio.sleep(delay)
+    return resp  # not reached
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    status_code: int
+    content: bytes
+    content_type: str
+    unchanged: bool  # same body as last time and processed recently: the caller can skip it
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+
+class HttpCache:
+    """
+    Stores validators (ETag/Last-Modified), a body hash and the body per URL under
+    HTTP_CACHE_DIR/<namespace>. get() sends a conditional request and flags the response
+    as unchanged on 304 or an identical body; callers call mark_processed() once the body
+    has been parsed and written, which arms the skip for the next run. Opening a cache
+    drops entries whose URL has not been fetched for HTTP_CACHE_MAX_AGE_D days.
+    """
+
+    def __init__(self, namespace: str):
+        self.dir = os.path.join(HTTP_CACHE_DIR, namespace)
+        self.stats = {"fetched": 0, "not_modified": 0, "unchanged": 0, "pruned": 0}
+        if HTTP_CACHE:
+            os.makedirs(self.dir, exist_ok=True)
+            self._prune()
+
+    def _prune(self) -> None:
+        # the .json meta is rewritten on every fetch (200 or 304), so its mtime is the last fetch
+        cutoff = time.time() - HTTP_CACHE_MAX_AGE_D * 86400
+        for entry in os.scandir(self.dir):
+            try:
+                if entry.name.endswith(".tmp") and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                elif entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                    body = entry.path[:-len(".json")] + ".body"
+                    if os.path.exists(body):
+                        os.remove(body)
+                    os.remove(entry.path)
+                    self.stats["pruned"] += 1
+            except OSError:
+                pass
+
+    def _path(self, url: str, ext: str) -> str:
+        return os.path.join(self.dir, hashlib.sha1(url.encode()).hexdigest() + ext)
+
+    def _load_meta(self, url: str) -> dict | None:
+        try:
+            with open(self._path(url, ".json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: str, data: bytes) -> None:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _save_meta(self, url: str, meta: dict) -> None:
+        self._write(self._path(url, ".json"), json.dumps(meta).encode())
+
+    def _recent(self, meta: dict) -> bool:
+        done = meta.get("processed_at")
+        return bool(done) and time.time() - done < HTTP_CACHE_REPROCESS_H * 3600
+
+    async def get(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        *,
+        limiter: HostRateLimiter | None = None,
+        **kw,
+    ) -> CachedResponse:
+        if not HTTP_CACHE:
+            resp = await get_with_retry(client, url, limiter=limiter, **kw)
+            return CachedResponse(url, resp.status_code, resp.content,
+                                  resp.headers.get("content-type", ""), False)
+
+        meta = self._load_meta(url)
+        body_path = self._path(url, ".body")
+        headers = dict(kw.pop("headers", None) or {})
+        if meta and os.path.exists(body_path):
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        else:
+            meta = None
+
+        resp = await get_with_retry(client, url, limiter=limiter, headers=headers, **kw)
+
+        if resp.status_code == 304 and meta:
+            self.stats["not_modified"] += 1
+            with open(body_path, "rb") as f:
+                content = f.read()
+            unchanged = self._recent(meta)
+            self.stats["unchanged"] += unchanged
+            self._save_meta(url, {**meta, "fetched_at": time.time()})
+            return CachedResponse(url, 200, content, meta.get("content_type", ""), unchanged)
+
+        content_type = resp.headers.get("content-type", "")
+        if resp.status_code != 200:
+            return CachedResponse(url, resp.status_code, resp.content, content_type, False)
+
+        self.stats["fetched"] += 1
+        digest = hashlib.sha256(resp.content).hexdigest()
+        same = bool(meta) and meta.get("sha256") == digest
+        unchanged = same and self._recent(meta)
+        self.stats["unchanged"] += unchanged
+        if not same:
+            self._write(body_path, resp.content)
+        self._save_meta(url, {
+            "etag": resp.headers.get("etag"),
+            "last_modified": resp.headers.get("last-modified"),
+            "content_type": content_type,
+            "sha256": digest,
+            "fetched_at": time.time(),
+            "processed_at": meta.get("processed_at") if same else None,
+        })
+        return CachedResponse(url, 200, resp.content, content_type, unchanged)
+
+    def mark_processed(self, url: str) -> None:
+        if not HTTP_CACHE:
+            return
+        meta = self._load_meta(url)
+        if meta:
+            meta["processed_at"] = time.time()
+            self._save_meta(url, meta)
@@ -1,21 +1,22 @@
 # backend/app/scrapers/_playwright_thread.py
 
-import sys
-import asyncio
-from playwright.sync_api import sync_playwright, TimeoutError as PTimeout
+from playwright.sync_api import TimeoutError as PTimeout
 from typing import List
 import re
 import os
 import tempfile
 from datetime import datetime
-from ..utils.normalize import canon_store, parse_fat_pct, classify
+from ..utils.normalize import canon_store, item_attributes
+from . import _browser_pool as browser_pool
+from . import _request_policy as request_policy
+from . import _vivafresh_api
 
-def _ensure_proactor():
-    if sys.platform == "win32":
-        try:
-            asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-        except Exception:
-            pass
+FB_LAUNCH_ARGS = ("--lang=sq-AL",)
+FB_GRID_LAUNCH_ARGS = ("--lang=sq-AL", "--headless=new", "--disable-gpu", "--no-sandbox")
+
+# Viva Fresh infinite scroll: max scroll steps per category and the wait between them
+VIVAFRESH_SCROLL_STEPS = int(os.getenv("VIVAFRESH_SCROLL_STEPS", "80"))
+VIVAFRESH_SCROLL_WAIT_MS = int(os.getenv("VIVAFRESH_SCROLL_WAIT_MS", "250"))
 
 def _apply_fb_cookie(context, cookie_header: str | None):
     if not cookie_header:
@@ -33,172 +34,173 @@ def download_fb_image_sync(url: str, referer: str, cookie_header: str | None) ->
     Download an image by requesting the EXACT fbcdn URL (unaltered).
     Uses Playwright's request context with hardened headers, then falls back to DOM injection/screenshot.
     """
-    _ensure_proactor()
+    return browser_pool.run(_download_fb_image, url, referer, cookie_header, launch_args=FB_LAUNCH_ARGS)
 
+def _download_fb_image(browser, url: str, referer: str, cookie_header: str | None) -> str | None:
     url_no_qs = url.split("?", 1)[0]
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True, args=["--lang=sq-AL"])
-        context = browser.new_context(
-            locale="sq-AL",
-            user_agent=("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/124.0.0.0 Safari/537.36"),
-            accept_downloads=False,
-            bypass_csp=True,
-            extra_http_headers={
-                "Accept-Language": "sq-AL,sq;q=0.9,en;q=0.8",
+    context = browser.new_context(
+        locale="sq-AL",
+        user_agent=("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                    "AppleWebKit/537.36 (KHTML, like Gecko) "
+                    "Chrome/124.0.0.0 Safari/537.36"),
+        accept_downloads=False,
+        bypass_csp=True,
+        extra_http_headers={
+            "Accept-Language": "sq-AL,sq;q=0.9,en;q=0.8",
+        },
+    )
+    request_policy.attach(context, "facebook")
+    _apply_fb_cookie(context, cookie_header)
+    page = context.new_page()
+
+    # Normalize referer to m.facebook.com (referer ONLY)
+    if "mbasic.facebook.com" in referer:
+        referer = referer.replace("mbasic.facebook.com", "m.facebook.com")
+    if "www.facebook.com" in referer:
+        referer = referer.replace("www.facebook.com", "m.facebook.com")
+
+    try:
+        # (A) FIRST: try Playwright's request API with hard headers
+        r = context.request.get(
+            url,  # IMPORTANT: unaltered fbcdn URL
+            headers={
+                "Referer": referer,
+                "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
+                "Origin": "https://m.facebook.com",
+                "Sec-Fetch-Dest": "image",
+                "Sec-Fetch-Mode": "no-cors",
+                "Sec-Fetch-Site": "same-site",
+                'sec-ch-ua': '"Chromium";v="124", "Not.A/Brand";v="24"',
+                'sec-ch-ua-mobile': '?0',
+                'sec-ch-ua-platform': '"Windows"',
             },
         )
-        _apply_fb_cookie(context, cookie_header)
-        page = context.new_page()
+        if r.ok:
+            fd, path = tempfile.mkstemp(suffix=".jpg")
+            os.write(fd, r.body()); os.close(fd)
+            return path
 
-        # Normalize referer to m.facebook.com (referer ONLY)
-        if "mbasic.facebook.com" in referer:
-            referer = referer.replace("mbasic.facebook.com", "m.facebook.com")
-        if "www.facebook.com" in referer:
-            referer = referer.replace("www.facebook.com", "m.facebook.com")
+        # (B) If that fails, visit referer and inject <img> (CSP-safe)
+        page.goto(referer, wait_until="domcontentloaded", timeout=45000)
 
+        captured = {"body": None}
+        def _on_response(resp):
+            try:
+                want = url_no_qs.rsplit("/", 1)[-1]
+                got = resp.url.split("?", 1)[0].rsplit("/", 1)[-1]
+                if resp.ok and (resp.url.split("?",1)[0] == url_no_qs or got == want):
+                    captured["body"] = resp.body()
+            except Exception:
+                pass
+        page.on("response", _on_response)
+
+        page.evaluate("""
+            (u) => {
+                const img = document.createElement('img');
+                img.id = 'kpc_dl_img';
+                img.src = u;
+                img.style.maxWidth = 'none';
+                img.style.maxHeight = 'none';
+                document.body.appendChild(img);
+            }
+        """, url)
+
+        img = page.locator("#kpc_dl_img")
         try:
-            # (A) FIRST: try Playwright's request API with hard headers
-            r = context.request.get(
-                url,  # IMPORTANT: unaltered fbcdn URL
-                headers={
-                    "Referer": referer,
-                    "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
-                    "Origin": "https://m.facebook.com",
-                    "Sec-Fetch-Dest": "image",
-                    "Sec-Fetch-Mode": "no-cors",
-                    "Sec-Fetch-Site": "same-site",
-                    'sec-ch-ua': '"Chromium";v="124", "Not.A/Brand";v="24"',
-                    'sec-ch-ua-mobile': '?0',
-                    'sec-ch-ua-platform': '"Windows"',
-                },
-            )
-            if r.ok:
-                fd, path = tempfile.mkstemp(suffix=".jpg")
-                os.write(fd, r.body()); os.close(fd)
-                return path
-
-            # (B) If that fails, visit referer and inject <img> (CSP-safe)
-            page.goto(referer, wait_until="domcontentloaded", timeout=45000)
-
-            captured = {"body": None}
-            def _on_response(resp):
+            img.wait_for(state="visible", timeout=20000)
+            # CSP-safe polling
+            for _ in range(80):
                 try:
-                    want = url_no_qs.rsplit("/", 1)[-1]
-                    got = resp.url.split("?", 1)[0].rsplit("/", 1)[-1]
-                    if resp.ok and (resp.url.split("?",1)[0] == url_no_qs or got == want):
-                        captured["body"] = resp.body()
+                    ready = img.evaluate("i => !!i && i.complete && i.naturalWidth>0 && i.naturalHeight>0")
                 except Exception:
-                    pass
-            page.on("response", _on_response)
-
-            page.evaluate("""
-                (u) => {
-                    const img = document.createElement('img');
-                    img.id = 'kpc_dl_img';
-                    img.src = u;
-                    img.style.maxWidth = 'none';
-                    img.style.maxHeight = 'none';
-                    document.body.appendChild(img);
-                }
-            """, url)
-
-            img = page.locator("#kpc_dl_img")
-            try:
-                img.wait_for(state="visible", timeout=20000)
-                # CSP-safe polling
-                for _ in range(80):
-                    try:
-                        ready = img.evaluate("i => !!i && i.complete && i.naturalWidth>0 && i.naturalHeight>0")
-                    except Exception:
-                        ready = False
-                    if ready:
-                        break
-                    page.wait_for_timeout(250)
-                else:
-                    return None
-            except PTimeout:
-                return None
-
-            if captured["body"]:
-                fd, path = tempfile.mkstemp(suffix=".jpg")
-                os.write(fd, captured["body"]); os.close(fd)
-                return path
-
-            natural = page.evaluate("""
-                () => {
-                    const i = document.getElementById('kpc_dl_img');
-                    return { w: i?.naturalWidth || 0, h: i?.naturalHeight || 0 };
-                }
-            """)
-            if natural["w"] <= 0 or natural["h"] <= 0:
+                    ready = False
+                if ready:
+                    break
+                page.wait_for_timeout(250)
+            else:
                 return None
+        except PTimeout:
+            return None
 
-            page.set_viewport_size({
-                "width": min(max(natural["w"], 10), 4096),
-                "height": min(max(natural["h"], 10), 4096),
-            })
-            path = tempfile.mkstemp(suffix=".jpg")[1]
-            img.screenshot(path=path)
+        if captured["body"]:
+            fd, path = tempfile.mkstemp(suffix=".jpg")
+            os.write(fd, captured["body"]); os.close(fd)
             return path
-        finally:
-            browser.close()
+
+        natural = page.evaluate("""
+            () => {
+                const i = document.getElementById('kpc_dl_img');
+                return { w: i?.naturalWidth || 0, h: i?.naturalHeight || 0 };
+            }
+        """)
+        if natural["w"] <= 0 or natural["h"] <= 0:
+            return None
+
+        page.set_viewport_size({
+            "width": min(max(natural["w"], 10), 4096),
+            "height": min(max(natural["h"], 10), 4096),
+        })
+        path = tempfile.mkstemp(suffix=".jpg")[1]
+        img.screenshot(path=path)
+        return path
+    finally:
+        context.close()
     
     # --- FINAL FALLBACK: open the referer page and screenshot the largest img it renders ---
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True, args=["--lang=sq-AL"])
-            context = browser.new_context(locale="sq-AL", user_agent=("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"))
-            _apply_fb_cookie(context, cookie_header)
-            page = context.new_page()
-            page.goto(referer, wait_until="domcontentloaded", timeout=45000)
-            try:
-                page.wait_for_load_state("networkidle", timeout=8000)
-            except PTimeout:
-                pass
+        context = browser.new_context(locale="sq-AL", user_agent=("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"))
+        request_policy.attach(context, "facebook")
+        _apply_fb_cookie(context, cookie_header)
+        page = context.new_page()
+        page.goto(referer, wait_until="domcontentloaded", timeout=45000)
+        try:
+            page.wait_for_load_state("networkidle", timeout=8000)
+        except PTimeout:
+            pass
 
-            info = page.evaluate("""
-                () => {
-                    const imgs = Array.from(document.images || []);
-                    const score = i => {
-                        const w = i.naturalWidth || 0, h = i.naturalHeight || 0;
-                        const ok = w>150 && h>150;
-                        const src = (i.currentSrc || i.src || "").toLowerCase();
-                        const cdn = src.includes("fbcdn");
-                        return ok ? [cdn ? 1 : 0, w*h] : [-1, 0];
-                    };
-                    let best = null, bestScore = [-1,0];
-                    for (const i of imgs) {
-                        const s = score(i);
-                        if (s[0] > bestScore[0] || (s[0] === bestScore[0] && s[1] > bestScore[1])) {
-                            best = i; bestScore = s;
-                        }
+        info = page.evaluate("""
+            () => {
+                const imgs = Array.from(document.images || []);
+                const score = i => {
+                    const w = i.naturalWidth || 0, h = i.naturalHeight || 0;
+                    const ok = w>150 && h>150;
+                    const src = (i.currentSrc || i.src || "").toLowerCase();
+                    const cdn = src.includes("fbcdn");
+                    return ok ? [cdn ? 1 : 0, w*h] : [-1, 0];
+                };
+                let best = null, bestScore = [-1,0];
+                for (const i of imgs) {
+                    const s = score(i);
+                    if (s[0] > bestScore[0] || (s[0] === bestScore[0] && s[1] > bestScore[1])) {
+                        best = i; bestScore = s;
                     }
-                    return best ? { id: (best.id || (best.id = "kpc_best_img")), w: best.naturalWidth, h: best.naturalHeight } : null;
                 }
-            """)
+                return best ? { id: (best.id || (best.id = "kpc_best_img")), w: best.naturalWidth, h: best.naturalHeight } : null;
+            }
+        """)
 
-            if info and info["w"] > 0 and info["h"] > 0:
-                img2 = page.locator(f"#{info['id']}")
-                try:
-                    img2.wait_for(state="visible", timeout=8000)
-                except PTimeout:
-                    pass
+        if info and info["w"] > 0 and info["h"] > 0:
+            img2 = page.locator(f"#{info['id']}")
+            try:
+                img2.wait_for(state="visible", timeout=8000)
+            except PTimeout:
+                pass
 
-                page.set_viewport_size({
-                    "width": min(max(int(info["w"]), 10), 4096),
-                    "height": min(max(int(info["h"]), 10), 4096),
-                })
-                path = tempfile.mkstemp(suffix=".jpg")[1]
-                img2.screenshot(path=path)
-                return path
+            page.set_viewport_size({
+                "width": min(max(int(info["w"]), 10), 4096),
+                "height": min(max(int(info["h"]), 10), 4096),
+            })
+            path = tempfile.mkstemp(suffix=".jpg")[1]
+            img2.screenshot(path=path)
+            return path
     except Exception:
         pass
     finally:
-        if 'browser' in locals() and browser.is_connected():
-            browser.close()
+        try:
+            context.close()
+        except Exception:
+            pass
 
     return None
 
@@ -259,7 +261,21 @@ def _resolve_full_from_href(page, href: str) -> str | None:
 
     return None
 
-def _ts_from_photo_page_quick(page, href: str) -> int | None:
+def _ts_from_photo_page_quick(page, href: str, slug: str | None = None) -> int | None:
+    """
+    UNIX epoch (UTC seconds) of a photo permalink; photos already in fb_photos cost no page load.
+    """
+    from .facebook_flyer import _extract_photo_id_from_referer
+    from ..utils import fb_photos
+
+    photo_id = _extract_photo_id_from_referer(href)
+    ts = fb_photos.posted_at(photo_id)
+    if ts is None:
+        ts = _ts_from_photo_page_load(page, href)
+        fb_photos.remember_posted_at(photo_id, ts, slug)
+    return ts
+
+def _ts_from_photo_page_load(page, href: str) -> int | None:
     """
     Open a single photo permalink quickly and try to extract a UNIX epoch (UTC seconds).
     Covers multiple DOM patterns on m.facebook.com.
@@ -411,246 +427,244 @@ def _prime_and_scroll(page, scroll_pages):
 def collect_fb_images_sync(slug: str, scroll_pages: int = 6,
                            cookie_header: str | None = None,
                            want_n: int = 5):
-    _ensure_proactor()
+    return browser_pool.run(_collect_fb_images, slug, scroll_pages, cookie_header, want_n,
+                            launch_args=FB_GRID_LAUNCH_ARGS)
+
+def _collect_fb_images(browser, slug: str, scroll_pages: int, cookie_header: str | None, want_n: int):
     from .facebook_flyer import _key_for_dedupe, _is_thumbnail
 
     pairs: list[tuple[str, str]] = []
     seen = set()
-    with sync_playwright() as p:
-        # --- MODIFIED from Instruction C ---
-        browser = p.chromium.launch(
-            headless=True,
-            args=["--lang=sq-AL", "--headless=new", "--disable-gpu", "--no-sandbox"]
-        )
-        # --- END MODIFIED ---
-        context = browser.new_context(locale="sq-AL")
-        _apply_fb_cookie(context, cookie_header)
-        page = context.new_page()
-        ts_page = context.new_page()
-        import time
-        MAX_AGE_DAYS = int(os.getenv("FB_MAX_AGE_DAYS", "10"))
-        now_epoch = int(time.time())
-        cutoff_epoch = now_epoch - MAX_AGE_DAYS * 86400
+    context = browser.new_context(locale="sq-AL")
+    route_stats = request_policy.attach(context, "facebook")
+    _apply_fb_cookie(context, cookie_header)
+    page = context.new_page()
+    ts_page = context.new_page()
+    import time
+    MAX_AGE_DAYS = int(os.getenv("FB_MAX_AGE_DAYS", "10"))
+    now_epoch = int(time.time())
+    cutoff_epoch = now_epoch - MAX_AGE_DAYS * 86400
         
-        try:
-            mobile_candidates = [
-                f"https://m.facebook.com/{slug}/photos",        # try this first
-                f"https://m.facebook.com/{slug}/photos_by",
-                f"https://m.facebook.com/{slug}/photos_stream",
-            ]
+    try:
+        mobile_candidates = [
+            f"https://m.facebook.com/{slug}/photos",        # try this first
+            f"https://m.facebook.com/{slug}/photos_by",
+            f"https://m.facebook.com/{slug}/photos_stream",
+        ]
             
-            page_loaded = False
-            for url_try in mobile_candidates:
-                try:
-                    page.goto(url_try, wait_until="domcontentloaded", timeout=45000)
-                except PTimeout:
-                    continue
+        page_loaded = False
+        for url_try in mobile_candidates:
+            try:
+                page.goto(url_try, wait_until="domcontentloaded", timeout=45000)
+            except PTimeout:
+                continue
 
-                _accept_cookies_fast(page)
-                if _is_login_wall(page):
-                    continue
+            _accept_cookies_fast(page)
+            if _is_login_wall(page):
+                continue
 
-                _prime_and_scroll(page, max(2, min(4, scroll_pages)))
-                if not _has_grid_content(page):
-                    _accept_cookies_fast(page)
-                    _prime_and_scroll(page, 2)
-
-                if _has_grid_content(page):
-                    page_loaded = True
-                    print(f"[fb/pw:{slug}] using source: {page.url}")
-                    # --- NEW from Instruction A ---
-                    # --- force m-dot layout if we accidentally landed on www ---
-                    if "://www.facebook.com/" in page.url:
-                        murl = page.url.replace("://www.facebook.com/", "://m.facebook.com/")
-                        try:
-                            page.goto(murl, wait_until="domcontentloaded", timeout=45000)
-                            _accept_cookies_fast(page)
-                            _prime_and_scroll(page, 2)
-                        except Exception:
-                            pass
-                    # --- END NEW ---
-                    break
+            _prime_and_scroll(page, max(2, min(4, scroll_pages)))
+            if not _has_grid_content(page):
+                _accept_cookies_fast(page)
+                _prime_and_scroll(page, 2)
+
+            if _has_grid_content(page):
+                page_loaded = True
+                print(f"[fb/pw:{slug}] using source: {page.url}")
+                # --- NEW from Instruction A ---
+                # --- force m-dot layout if we accidentally landed on www ---
+                if "://www.facebook.com/" in page.url:
+                    murl = page.url.replace("://www.facebook.com/", "://m.facebook.com/")
+                    try:
+                        page.goto(murl, wait_until="domcontentloaded", timeout=45000)
+                        _accept_cookies_fast(page)
+                        _prime_and_scroll(page, 2)
+                    except Exception:
+                        pass
+                # --- END NEW ---
+                break
             
-            if not page_loaded:
-                print(f"[fb/pw:{slug}] returning 0 pairs (no grid content on any candidate)")
-                return pairs
+        if not page_loaded:
+            print(f"[fb/pw:{slug}] returning 0 pairs (no grid content on any candidate)")
+            return pairs
 
-            _prime_and_scroll(page, scroll_pages)
+        _prime_and_scroll(page, scroll_pages)
             
-            pairs_js = page.evaluate("""
-                () => {
-                    const out = [];
-                    const imgs = Array.from(document.images || []);
-                    const isFbCdn = (u) => (u || '').toLowerCase().includes('fbcdn');
-                    for (const img of imgs) {
-                        const src = img.currentSrc || img.getAttribute('src') || '';
-                        if (!isFbCdn(src)) continue;
-
-                        let a = img.closest && img.closest('a[href]');
-                        let href = a ? (a.getAttribute('href') || '') : '';
-                        if (!href && img.parentElement && img.parentElement.closest) {
-                            const pa = img.parentElement.closest('a[href]');
-                            if (pa) href = pa.getAttribute('href') || '';
-                        }
-
-                        const r = img.getBoundingClientRect();
-                        out.push({
-                            src,
-                            href,
-                            w: img.naturalWidth || 0,
-                            h: img.naturalHeight || 0,
-                            y: r.top || 0
-                        });
+        pairs_js = page.evaluate("""
+            () => {
+                const out = [];
+                const imgs = Array.from(document.images || []);
+                const isFbCdn = (u) => (u || '').toLowerCase().includes('fbcdn');
+                for (const img of imgs) {
+                    const src = img.currentSrc || img.getAttribute('src') || '';
+                    if (!isFbCdn(src)) continue;
+
+                    let a = img.closest && img.closest('a[href]');
+                    let href = a ? (a.getAttribute('href') || '') : '';
+                    if (!href && img.parentElement && img.parentElement.closest) {
+                        const pa = img.parentElement.closest('a[href]');
+                        if (pa) href = pa.getAttribute('href') || '';
                     }
-                    out.sort((a,b) => a.y - b.y);
-                    return out;
+
+                    const r = img.getBoundingClientRect();
+                    out.push({
+                        src,
+                        href,
+                        w: img.naturalWidth || 0,
+                        h: img.naturalHeight || 0,
+                        y: r.top || 0
+                    });
                 }
-            """)
+                out.sort((a,b) => a.y - b.y);
+                return out;
+            }
+        """)
 
-            from urllib.parse import urlparse
+        from urllib.parse import urlparse
             
-            for rec in pairs_js:
-                href = (rec.get("href") or "").strip()
+        for rec in pairs_js:
+            href = (rec.get("href") or "").strip()
                 
-                # --- NEW from Instruction A: require a photo/permalink href ---
-                if not href or ("/photo" not in href and "/photos/" not in href and "/permalink/" not in href):
-                    continue  # don't produce cdn-only pairs without a proper referer
-                # --- END NEW ---
+            # --- NEW from Instruction A: require a photo/permalink href ---
+            if not href or ("/photo" not in href and "/photos/" not in href and "/permalink/" not in href):
+                continue  # don't produce cdn-only pairs without a proper referer
+            # --- END NEW ---
 
-                src  = (rec.get("src")  or "").strip()
-                w    = int(rec.get("w") or 0)
-                h    = int(rec.get("h") or 0)
-                if not src or _is_thumbnail(src):
-                    continue
+            src  = (rec.get("src")  or "").strip()
+            w    = int(rec.get("w") or 0)
+            h    = int(rec.get("h") or 0)
+            if not src or _is_thumbnail(src):
+                continue
 
-                pr = urlparse(src)
-                host = (pr.netloc or "").lower()
-                path = (pr.path or "").lower()
+            pr = urlparse(src)
+            host = (pr.netloc or "").lower()
+            path = (pr.path or "").lower()
 
-                if not host.startswith("scontent.") or "fbcdn.net" not in host or "/rsrc.php" in path:
-                    continue
-                if not (path.endswith((".jpg", ".jpeg", ".png"))):
-                    continue
-                if w * h < 300_000 or (w < 750 and h < 750):
-                    continue
+            if not host.startswith("scontent.") or "fbcdn.net" not in host or "/rsrc.php" in path:
+                continue
+            if not (path.endswith((".jpg", ".jpeg", ".png"))):
+                continue
+            if w * h < 300_000 or (w < 750 and h < 750):
+                continue
 
-                # --- MODIFIED from Instruction A ---
-                referer = href if href.startswith("http") else "https://m.facebook.com" + href
-                referer = referer.replace("www.facebook.com", "m.facebook.com")
-                # --- END MODIFIED ---
+            # --- MODIFIED from Instruction A ---
+            referer = href if href.startswith("http") else "https://m.facebook.com" + href
+            referer = referer.replace("www.facebook.com", "m.facebook.com")
+            # --- END MODIFIED ---
 
-                k = _key_for_dedupe(src)
-                if k in seen:
-                    continue
-                seen.add(k)
-                pairs.append((src, referer))
-
-            if len(pairs) < want_n:
-                # --- MODIFIED from Instruction A ---
-                hrefs = page.evaluate("""
-                    () => Array.from(
-                            document.querySelectorAll(
-                                'a[href*="/photo"], a[href*="/photos/"], a[href*="/permalink/"], ' +
-                                'a[href^="/photo/"], a[href*="photo/?fbid="], a[href*="multi_permalinks"]'
-                            )
+            k = _key_for_dedupe(src)
+            if k in seen:
+                continue
+            seen.add(k)
+            pairs.append((src, referer))
+
+        if len(pairs) < want_n:
+            # --- MODIFIED from Instruction A ---
+            hrefs = page.evaluate("""
+                () => Array.from(
+                        document.querySelectorAll(
+                            'a[href*="/photo"], a[href*="/photos/"], a[href*="/permalink/"], ' +
+                            'a[href^="/photo/"], a[href*="photo/?fbid="], a[href*="multi_permalinks"]'
                         )
-                        .map(a => ({href: a.getAttribute('href') || '', y: a.getBoundingClientRect().top}))
-                        .filter(x => x.href)
-                        .sort((a,b) => a.y - b.y)
-                        .map(x => x.href)
-                        .slice(0, 80)
-                """)
-                # --- END MODIFIED ---
-                fresh_pairs = []
-                unknown_pairs = []
-                for href in hrefs:
-                    if len(fresh_pairs) >= want_n:
-                        break
-                    try:
-                        full = _resolve_full_from_href(page, href)
-                    except Exception:
-                        full = None
-                    if not full or _is_thumbnail(full):
-                        continue
+                    )
+                    .map(a => ({href: a.getAttribute('href') || '', y: a.getBoundingClientRect().top}))
+                    .filter(x => x.href)
+                    .sort((a,b) => a.y - b.y)
+                    .map(x => x.href)
+                    .slice(0, 80)
+            """)
+            # --- END MODIFIED ---
+            fresh_pairs = []
+            unknown_pairs = []
+            for href in hrefs:
+                if len(fresh_pairs) >= want_n:
+                    break
+                try:
+                    full = _resolve_full_from_href(page, href)
+                except Exception:
+                    full = None
+                if not full or _is_thumbnail(full):
+                    continue
                     
-                    pr = urlparse(full)
-                    if not (pr.netloc or "").lower().startswith("scontent."): continue
-                    if not (pr.path or "").lower().endswith((".jpg", ".jpeg", ".png")): continue
+                pr = urlparse(full)
+                if not (pr.netloc or "").lower().startswith("scontent."): continue
+                if not (pr.path or "").lower().endswith((".jpg", ".jpeg", ".png")): continue
 
-                    k = _key_for_dedupe(full)
-                    if k in seen: 
-                        continue
+                k = _key_for_dedupe(full)
+                if k in seen: 
+                    continue
 
-                    ts = _ts_from_photo_page_quick(ts_page, href)
-                    if ts is not None and ts < cutoff_epoch:
-                        continue
+                ts = _ts_from_photo_page_quick(ts_page, href, slug)
+                if ts is not None and ts < cutoff_epoch:
+                    continue
 
-                    pair = (full, href if href.startswith("http") else "https://m.facebook.com" + href)
-                    seen.add(k)
+                pair = (full, href if href.startswith("http") else "https://m.facebook.com" + href)
+                seen.add(k)
 
-                    if ts is None:
-                        unknown_pairs.append((ts, pair))
-                    else:
-                        fresh_pairs.append((ts, pair))
+                if ts is None:
+                    unknown_pairs.append((ts, pair))
+                else:
+                    fresh_pairs.append((ts, pair))
                 
-                fresh_pairs.sort(key=lambda x: -x[0])
-                ordered = [p for _ts, p in fresh_pairs]
-                if len(ordered) < want_n:
-                    ordered.extend([p for _ts, p in unknown_pairs])
+            fresh_pairs.sort(key=lambda x: -x[0])
+            ordered = [p for _ts, p in fresh_pairs]
+            if len(ordered) < want_n:
+                ordered.extend([p for _ts, p in unknown_pairs])
 
-                pairs.extend(ordered[:max(0, want_n - len(pairs))])
+            pairs.extend(ordered[:max(0, want_n - len(pairs))])
             
-            # --- NEW from Instruction E ---
-            valid = sum(1 for _, ref in pairs if ("/photo.php" in ref or "/photos/" in ref or "/permalink/" in ref))
-            print(f"[fb/pw:{slug}] collected {len(pairs)} total, {valid} with photo permalinks")
-            # --- END NEW ---
-
-            pairs_with_ts = []
-            for (src, ref) in pairs:
-                if "/photo.php" in ref or "/photos/" in ref:
-                    try:
-                        ts = _ts_from_photo_page_quick(ts_page, ref)
-                    except Exception:
-                        ts = None
-                else:
+        # --- NEW from Instruction E ---
+        valid = sum(1 for _, ref in pairs if ("/photo.php" in ref or "/photos/" in ref or "/permalink/" in ref))
+        print(f"[fb/pw:{slug}] collected {len(pairs)} total, {valid} with photo permalinks")
+        # --- END NEW ---
+
+        pairs_with_ts = []
+        for (src, ref) in pairs:
+            if "/photo.php" in ref or "/photos/" in ref:
+                try:
+                    ts = _ts_from_photo_page_quick(ts_page, ref, slug)
+                except Exception:
                     ts = None
-                pairs_with_ts.append((ts, (src, ref)))
-
-            fresh = []
-            unknown = []
-            for ts, pair in pairs_with_ts:
-                if ts is None:
-                    unknown.append((ts, pair))
-                elif ts >= cutoff_epoch:
-                    fresh.append((ts, pair))
-
-            fresh.sort(key=lambda x: -x[0])
-            ordered_pairs = [p for _ts, p in fresh] + [p for _ts, p in unknown]
+            else:
+                ts = None
+            pairs_with_ts.append((ts, (src, ref)))
+
+        fresh = []
+        unknown = []
+        for ts, pair in pairs_with_ts:
+            if ts is None:
+                unknown.append((ts, pair))
+            elif ts >= cutoff_epoch:
+                fresh.append((ts, pair))
+
+        fresh.sort(key=lambda x: -x[0])
+        ordered_pairs = [p for _ts, p in fresh] + [p for _ts, p in unknown]
             
-            pairs = ordered_pairs[:want_n]
+        pairs = ordered_pairs[:want_n]
             
-            def _dbg(ts):
-                import datetime as dt
-                return dt.datetime.utcfromtimestamp(ts).isoformat() + "Z"
-
-            debug_lines = []
-            fresh_pairs_for_log = [item for item in pairs_with_ts if item[0] is not None and item[0] >= cutoff_epoch]
-            fresh_pairs_for_log.sort(key=lambda x: -x[0])
-            unknown_pairs_for_log = [item for item in pairs_with_ts if item[0] is None]
-
-            for ts, pair in fresh_pairs_for_log[:want_n]:
-                debug_lines.append(f"KEEP fresh ts={ts} ({_dbg(ts)}) ref={pair[1]}")
-            for _ts, pair in unknown_pairs_for_log[:max(0, want_n - len(fresh_pairs_for_log))]:
-                debug_lines.append(f"KEEP unknown ref={pair[1]}")
-            print("\n".join(debug_lines))
-            print(f"[fb/pw:{slug}] returning {len(pairs)} pairs after ts-filter (cutoff={cutoff_epoch})")
-
-        finally:
-            try:
-                ts_page.close()
-            except Exception:
-                pass
-            browser.close()
+        def _dbg(ts):
+            import datetime as dt
+            return dt.datetime.utcfromtimestamp(ts).isoformat() + "Z"
+
+        debug_lines = []
+        fresh_pairs_for_log = [item for item in pairs_with_ts if item[0] is not None and item[0] >= cutoff_epoch]
+        fresh_pairs_for_log.sort(key=lambda x: -x[0])
+        unknown_pairs_for_log = [item for item in pairs_with_ts if item[0] is None]
+
+        for ts, pair in fresh_pairs_for_log[:want_n]:
+            debug_lines.append(f"KEEP fresh ts={ts} ({_dbg(ts)}) ref={pair[1]}")
+        for _ts, pair in unknown_pairs_for_log[:max(0, want_n - len(fresh_pairs_for_log))]:
+            debug_lines.append(f"KEEP unknown ref={pair[1]}")
+        print("\n".join(debug_lines))
+        print(f"[fb/pw:{slug}] returning {len(pairs)} pairs after ts-filter (cutoff={cutoff_epoch})")
+
+    finally:
+        try:
+            ts_page.close()
+        except Exception:
+            pass
+        route_stats.log()
+        context.close()
     return pairs
 
 def _dedupe_sync(seq: List[str]) -> List[str]:
@@ -666,19 +680,21 @@ def _harvest_page_for_pdfs_sync(page, base_url: str) -> List[str]:
     return _dedupe_sync(pdfs)
 
 def collect_etc_pdfs_sync(listing_url: str) -> List[str]:
-    _ensure_proactor()
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        ctx = browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36")
+    return browser_pool.run(_collect_etc_pdfs, listing_url)
+
+def _collect_etc_pdfs(browser, listing_url: str) -> List[str]:
+    ctx = browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36")
+    request_policy.attach(ctx, "etc")
+    try:
         page = ctx.new_page()
         page.goto(listing_url, wait_until="domcontentloaded", timeout=30000)
         try:
             page.wait_for_load_state("networkidle", timeout=5000)
         except PTimeout:
             pass
-        pdfs = _harvest_page_for_pdfs_sync(page, listing_url)
-        browser.close()
-        return pdfs
+        return _harvest_page_for_pdfs_sync(page, listing_url)
+    finally:
+        ctx.close()
 
 # ---------------------- Viva Fresh: hardened crawler ----------------------
 
@@ -704,14 +720,14 @@ def _vf_accept_and_pick_city(page):
         except Exception:
             pass
 
-def _vf_scroll_all(page, max_steps=80):
+def _vf_scroll_all(page, max_steps=VIVAFRESH_SCROLL_STEPS):
     last_h = 0
     for _ in range(max_steps):
         try:
             page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
         except Exception:
             pass
-        page.wait_for_timeout(250)
+        page.wait_for_timeout(VIVAFRESH_SCROLL_WAIT_MS)
         try:
             h = page.evaluate("document.body.scrollHeight")
         except Exception:
@@ -766,6 +782,97 @@ def _vf_discover_subcats(page, base: str) -> list[int]:
     except Exception:
         return []
 
+VF_CARD_SELECTOR = ".product-card, .product-box, .product-item"
+VF_NAME_SELECTORS = [".product-title", ".title", ".name", "h3", "a[title]"]
+VF_PRICE_SELECTORS = [".current-price", ".new-price", ".price", ".product-price", "[class*='price']"]
+
+# One round trip for the whole grid: per card the first non-empty name, every non-empty
+# price candidate in selector order (parsed in Python) and the first link.
+_VF_CARDS_JS = """
+({cardSel, nameSels, priceSels}) => Array.from(document.querySelectorAll(cardSel)).map(c => {
+    const text = (s) => { const el = c.querySelector(s); return el ? (el.innerText || "").trim() : ""; };
+    const name = nameSels.map(text).find(t => t) || null;
+    const prices = priceSels.map(text).filter(t => t);
+    const a = c.querySelector("a[href]");
+    return {name, prices, href: a ? a.getAttribute("href") || "" : null};
+})
+"""
+
+def _vf_extract_cards(page) -> list[dict]:
+    try:
+        return page.evaluate(_VF_CARDS_JS, {
+            "cardSel": VF_CARD_SELECTOR, "nameSels": VF_NAME_SELECTORS, "priceSels": VF_PRICE_SELECTORS,
+        }) or []
+    except Exception:
+        return []
+
+def _vf_store_item(db, store, base: str, name: str, price_eur: float, href: str | None) -> None:
+    """Find-or-create the StoreItem (keyed by product URL) and add today's Price."""
+    from ..models import StoreItem, Price
+    from ..utils.normalize import parse_size_and_fat, unit_price_eur
+
+    # URL (optional)
+    urlp = None
+    if href is not None:
+        urlp = href if href.startswith("http") else base.rstrip("/") + href
+
+    # Normalize & store
+    size_ml_g, unit_hint, _fat = parse_size_and_fat(name)
+    uprice = unit_price_eur(price_eur, size_ml_g, unit_hint)
+
+    item = db.query(StoreItem).filter_by(store_id=store.id, url=urlp).one_or_none()
+    if not item:
+        item = StoreItem(store_id=store.id, external_id=(urlp or name)[:64], raw_name=name, url=urlp, **item_attributes(name))
+        db.add(item); db.flush()
+
+    db.add(Price(
+        store_item_id=item.id,
+        store_id=store.id,
+        price_eur=price_eur,
+        unit_price=uprice,
+        collected_at=datetime.utcnow()
+    ))
+
+def _vf_crawl_category(page, db, store, base: str, lvl2: int, capture=None) -> int:
+    """Load one lvl2 category, read all cards in one evaluate and store/commit items/prices."""
+    if capture is not None:
+        capture.current = lvl2
+    try:
+        page.goto(f"{base}categories/?lvl2={lvl2}", wait_until="load", timeout=60000)
+        try:
+            page.wait_for_load_state("networkidle", timeout=15000)
+        except PTimeout:
+            pass
+        _vf_accept_and_pick_city(page)
+        # don’t hard fail if selectors don’t appear—just continue
+        try:
+            page.wait_for_selector(VF_CARD_SELECTOR, timeout=12000)
+        except PTimeout:
+            pass
+    except PTimeout:
+        return 0
+
+    _vf_scroll_all(page)
+
+    cards = _vf_extract_cards(page)
+    if capture is not None:
+        capture.learn(cards)
+
+    processed = 0
+    for card in cards:
+        name = card.get("name")
+        if not name:
+            continue
+        price_eur = next((v for v in map(_vf_parse_price, card.get("prices") or []) if v is not None), None)
+        if price_eur is None:
+            continue
+
+        _vf_store_item(db, store, base, name, price_eur, card.get("href"))
+        processed += 1
+    # commit per category so the write lock is not held while the next page loads
+    db.commit()
+    return processed
+
 def crawl_vivafresh_sync(db, city: str = "Prishtina") -> int:
     """
     Scrapes Viva Fresh categories and stores items/prices.
@@ -773,9 +880,10 @@ def crawl_vivafresh_sync(db, city: str = "Prishtina") -> int:
       - VIVAFRESH_BASE (default https://online.vivafresh.shop/)
       - VIVAFRESH_LVL2_IDS (comma sep, e.g. 13,14,15)
     """
-    _ensure_proactor()
-    from ..models import Store, StoreItem, Price
-    from ..utils.normalize import parse_size_and_fat, unit_price_eur
+    return browser_pool.run(_crawl_vivafresh, db, city)
+
+def _crawl_vivafresh(browser, db, city: str) -> int:
+    from ..models import Store
 
     BASE = os.getenv("VIVAFRESH_BASE", "https://online.vivafresh.shop/")
     default_ids = [13, 14, 15, 16, 17, 18, 19]
@@ -795,149 +903,44 @@ def crawl_vivafresh_sync(db, city: str = "Prishtina") -> int:
 
     processed = 0
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            locale="sq-AL",
-            user_agent=("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-                        "(KHTML, like Gecko) Chrome/125.0 Safari/537.36 kpc/1.1"),
-            bypass_csp=True,
-            extra_http_headers={
-                "Accept-Language": "sq-AL,sq;q=0.9,en;q=0.8",
-                "sec-ch-ua": '"Chromium";v="125", "Not.A/Brand";v="24"',
-                "sec-ch-ua-mobile": "?0",
-                "sec-ch-ua-platform": '"Linux"',
-            },
-        )
-        page = context.new_page()
-
-        page.goto(BASE, wait_until="load", timeout=60000)
-        _vf_accept_and_pick_city(page)
-
-        # Try each lvl2 page
-        for lvl2 in DAIRY_SUBCATEGORIES:
-            url = f"{BASE}categories/?lvl2={lvl2}"
-            try:
-                page.goto(url, wait_until="load", timeout=60000)
-                try:
-                    page.wait_for_load_state("networkidle", timeout=15000)
-                except PTimeout:
-                    pass
-                _vf_accept_and_pick_city(page)
-                # don’t hard fail if selectors don’t appear—just continue
-                try:
-                    page.wait_for_selector(".product-card, .product-box, .product-item", timeout=12000)
-                except PTimeout:
-                    pass
-            except PTimeout:
-                continue
-
-            _vf_scroll_all(page, max_steps=80)
-            cards = page.query_selector_all(".product-card, .product-box, .product-item")
-            
-            for c in cards:
-                # Name
-                name = None
-                for sel in [".product-title", ".title", ".name", "h3", "a[title]"]:
-                    el = c.query_selector(sel)
-                    if el and (txt := (el.inner_text() or "").strip()):
-                        name = txt
-                        break
-                if not name:
-                    continue
-
-                # Price
-                price_eur = None
-                for sel in [".current-price", ".new-price", ".price", ".product-price", "[class*='price']"]:
-                    el = c.query_selector(sel)
-                    if el and (txt := (el.inner_text() or "").strip()):
-                        val = _vf_parse_price(txt)
-                        if val is not None:
-                            price_eur = val
-                            break
-                if price_eur is None:
-                    continue
-
-                # URL (optional)
-                urlp = None
-                if a := c.query_selector("a[href]"):
-                    href = a.get_attribute("href") or ""
-                    urlp = href if href.startswith("http") else BASE.rstrip("/") + href
-
-                # Normalize & store
-                size_ml_g, unit_hint, _fat = parse_size_and_fat(name)
-                uprice = unit_price_eur(price_eur, size_ml_g, unit_hint)
-
-                item = db.query(StoreItem).filter_by(store_id=store.id, url=urlp).one_or_none()
-                if not item:
-                    ext_id = (urlp or name)[:64]
-                    item = StoreItem(store_id=store.id, external_id=ext_id, raw_name=name, url=urlp, category_norm = classify(name),fat_pct = parse_fat_pct(name))
-                    db.add(item); db.flush()
-
-                db.add(Price(
-                    store_item_id=item.id,
-                    store_id=store.id,  # <-- ✅ This line was added
-                    price_eur=price_eur,
-                    unit_price=uprice,
-                    collected_at=datetime.utcnow()
-                ))
-                processed += 1
-
-        # If nothing processed (IDs outdated), auto-discover and try once
-        if processed == 0:
-            discovered = _vf_discover_subcats(page, BASE)
-            if not discovered:
-                discovered = default_ids  # fallback again just in case
-            for lvl2 in discovered:
-                try:
-                    page.goto(f"{BASE}categories/?lvl2={lvl2}", wait_until="load", timeout=60000)
-                except PTimeout:
-                    continue
-                _vf_accept_and_pick_city(page)
-                try:
-                    page.wait_for_load_state("networkidle", timeout=8000)
-                except PTimeout:
-                    pass
-                _vf_scroll_all(page, max_steps=80)
-                cards = page.query_selector_all(".product-card, .product-box, .product-item")
-                for c in cards:
-                    name = None
-                    for sel in [".product-title", ".title", ".name", "h3", "a[title]"]:
-                        el = c.query_selector(sel)
-                        if el and (txt := (el.inner_text() or "").strip()):
-                            name = txt; break
-                    if not name: 
-                        continue
-                    price_eur = None
-                    for sel in [".current-price", ".new-price", ".price", ".product-price", "[class*='price']"]:
-                        el = c.query_selector(sel)
-                        if el and (pt := (el.inner_text() or "").strip()):
-                            val = _vf_parse_price(pt)
-                            if val is not None: 
-                                price_eur = val; break
-                    if price_eur is None: 
-                        continue
-                    urlp = None
-                    if a := c.query_selector("a[href]"):
-                        href = a.get_attribute("href") or ""
-                        urlp = href if href.startswith("http") else BASE.rstrip("/") + href
-                    size_ml_g, unit_hint, _fat = parse_size_and_fat(name)
-                    uprice = unit_price_eur(price_eur, size_ml_g, unit_hint)
-                    item = db.query(StoreItem).filter_by(store_id=store.id, url=urlp).one_or_none()
-                    if not item:
-                        item = StoreItem(store_id=store.id, external_id=(urlp or name)[:64], raw_name=name, url=urlp, category_norm = classify(name), fat_pct = parse_fat_pct(name))
-                        db.add(item); db.flush()
-                    db.add(Price(
-                        store_item_id=item.id,
-                        store_id=store.id,  # <-- ✅ This line was added
-                        price_eur=price_eur,
-                        unit_price=uprice,
-                        collected_at=datetime.utcnow()
-                    ))
-                    processed += 1
-
-        db.commit()
-        browser.close()
-
+    context = browser.new_context(
+        locale="sq-AL",
+        user_agent=("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+                    "(KHTML, like Gecko) Chrome/125.0 Safari/537.36 kpc/1.1"),
+        bypass_csp=True,
+        extra_http_headers={
+            "Accept-Language": "sq-AL,sq;q=0.9,en;q=0.8",
+            "sec-ch-ua": '"Chromium";v="125", "Not.A/Brand";v="24"',
+            "sec-ch-ua-mobile": "?0",
+            "sec-ch-ua-platform": '"Linux"',
+        },
+    )
+    route_stats = request_policy.attach(context, "vivafresh")
+    page = context.new_page()
+    # record the product XHRs so the next runs can replay them without a browser
+    capture = _vivafresh_api.ApiCapture(BASE)
+    page.on("response", capture.on_response)
+
+    page.goto(BASE, wait_until="load", timeout=60000)
+    _vf_accept_and_pick_city(page)
+
+    # Try each lvl2 page
+    for lvl2 in DAIRY_SUBCATEGORIES:
+        processed += _vf_crawl_category(page, db, store, BASE, lvl2, capture)
+
+    # If nothing processed (IDs outdated), auto-discover and try once
+    if processed == 0:
+        discovered = _vf_discover_subcats(page, BASE)
+        if not discovered:
+            discovered = default_ids  # fallback again just in case
+        for lvl2 in discovered:
+            processed += _vf_crawl_category(page, db, store, BASE, lvl2, capture)
+
+    route_stats.log()
+    cookies = context.cookies()
+    context.close()
+
+    if processed and capture.save(cookies):
+        print(f"[vivafresh] captured product API for {len(capture.endpoints)} categories")
     print(f"[vivafresh] processed {processed} items")
     return processed
\ No newline at end of file
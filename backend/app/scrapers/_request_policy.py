@@ -0,0 +1,98 @@
+# backend/app/scrapers/_request_policy.py
+# Request interception for the Playwright scrapers: abort fonts, media, trackers and
+# third-party assets a scrape never looks at, per-scraper allowlist of first-party hosts.
+# PW_BLOCK_RESOURCES=0 turns it off; PW_ALLOW_HOSTS_<NAME> adds hosts to a scraper's allowlist
+# (e.g. PW_ALLOW_HOSTS_VIVAFRESH=cdn.example.com). Each attached context counts pages and
+# blocked requests so the effect shows up in the logs as pages/min.
+from __future__ import annotations
+
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+PW_BLOCK_RESOURCES = os.getenv("PW_BLOCK_RESOURCES", "1") == "1"
+
+TRACKER_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "hotjar.com", "clarity.ms", "connect.facebook.net", "tiktok.com", "adservice.google.com",
+)
+# asset types that are only fetched from allowlisted hosts; xhr/fetch stay open (APIs may
+# live on another domain) unless the host is a known tracker
+THIRD_PARTY_TYPES = frozenset({"script", "stylesheet", "image", "font", "media", "ping", "other"})
+
+
+@dataclass(frozen=True)
+class BlockPolicy:
+    allow_hosts: tuple[str, ...]
+    block_types: frozenset[str]
+
+
+POLICIES = {
+    # cards are read from the DOM: no pictures needed, layout (CSS) is for infinite scroll
+    "vivafresh": BlockPolicy(("vivafresh.shop",), frozenset({"image", "font", "media"})),
+    # photo grids and full-size images come from fbcdn; keep images, drop video/fonts
+    "facebook": BlockPolicy(("facebook.com", "fbcdn.net"), frozenset({"font", "media"})),
+    # only the listing's <a href="*.pdf"> links matter
+    "etc": BlockPolicy(("etc-ks.com",), frozenset({"image", "font", "media", "stylesheet"})),
+}
+
+
+def _host_in(host: str, hosts) -> bool:
+    return any(host == h or host.endswith("." + h) for h in hosts)
+
+
+@dataclass
+class RouteStats:
+    name: str
+    started: float = field(default_factory=time.monotonic)
+    pages: int = 0
+    requests: int = 0
+    blocked: int = 0
+
+    def log(self) -> None:
+        minutes = max(time.monotonic() - self.started, 1e-6) / 60
+        logger.info(
+            "[pw:%s] %d pages in %.1f min (%.1f pages/min), blocked %d/%d requests",
+            self.name, self.pages, minutes, self.pages / minutes, self.blocked, self.requests,
+        )
+
+
+def attach(context, name: str) -> RouteStats:
+    """Install the named policy on a browser context; returns its live counters."""
+    stats = RouteStats(name)
+    policy = POLICIES.get(name)
+    extra = tuple(h.strip() for h in os.getenv(f"PW_ALLOW_HOSTS_{name.upper()}", "").split(",") if h.strip())
+    allow_hosts = (policy.allow_hosts if policy else ()) + extra
+
+    def _count_page(frame):
+        if frame.parent_frame is None:
+            stats.pages += 1
+
+    context.on("page", lambda page: page.on("framenavigated", _count_page))
+    if not PW_BLOCK_RESOURCES or policy is None:
+        return stats
+
+    def _route(route):
+        req = route.request
+        stats.requests += 1
+        rtype = req.resource_type
+        host = (urlparse(req.url).hostname or "").lower()
+        blocked = (
+            rtype in policy.block_types
+            or _host_in(host, TRACKER_HOSTS)
+            or (rtype in THIRD_PARTY_TYPES and not _host_in(host, allow_hosts))
+        )
+        if rtype == "document" and req.is_navigation_request():
+            blocked = False
+        if blocked:
+            stats.blocked += 1
+            route.abort()
+        else:
+            route.continue_()
+
+    context.route("**/*", _route)
+    return stats
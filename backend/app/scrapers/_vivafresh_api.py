@@ -0,0 +1,224 @@
+# backend/app/scrapers/_vivafresh_api.py
+# Viva Fresh renders its shop client-side from JSON XHRs. A browser run records those
+# endpoints per lvl2 category (ApiCapture, hooked into the page's response events) together
+# with the JSON field names and the product-link pattern; later runs replay them with httpx
+# (replay) and only fall back to the browser when the replay no longer looks like the
+# captured contract. Prices depend on the city picked in the browser, so the capture also
+# keeps the XHR request headers and the context cookies and replay sends them back. State
+# lives in VIVAFRESH_API_STATE and is refreshed by a browser run every VIVAFRESH_API_MAX_AGE_D days.
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import Counter
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import httpx
+
+from ._http import get_with_retry
+
+VIVAFRESH_API = os.getenv("VIVAFRESH_API", "1") == "1"
+VIVAFRESH_API_STATE = os.getenv("VIVAFRESH_API_STATE", ".vivafresh_api.json")
+VIVAFRESH_API_MAX_AGE_D = float(os.getenv("VIVAFRESH_API_MAX_AGE_D", "7"))
+MAX_EXTRA_PAGES = 50
+
+NAME_KEYS = ("name", "title", "product_name", "productName", "display_name")
+PRICE_KEYS = ("current_price", "sale_price", "salePrice", "final_price", "finalPrice",
+              "price_with_vat", "priceWithVat", "price")
+PAGE_PARAMS = ("page", "p", "pageNumber", "page_number")
+# request headers not worth replaying (connection-level, or set by httpx itself)
+SKIP_HEADERS = {"host", "connection", "content-length", "accept-encoding", "cookie", "keep-alive",
+                "transfer-encoding", "te", "upgrade"}
+
+
+class ContractChanged(Exception):
+    pass
+
+
+def _pick(keys, obj: dict) -> str | None:
+    return next((k for k in keys if obj.get(k) not in (None, "")), None)
+
+
+def find_products(data) -> tuple[list[dict], dict | None]:
+    """The largest list of product-like dicts anywhere in a JSON document, and its field names."""
+    best: list[dict] = []
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            dicts = [x for x in node if isinstance(x, dict)]
+            hits = [x for x in dicts if _pick(NAME_KEYS, x) and _pick(PRICE_KEYS, x)]
+            if dicts and len(hits) * 2 >= len(dicts) and len(hits) > len(best):
+                best = hits
+            stack.extend(dicts)
+    if not best:
+        return [], None
+    fields = {
+        "name": Counter(_pick(NAME_KEYS, x) for x in best).most_common(1)[0][0],
+        "price": Counter(_pick(PRICE_KEYS, x) for x in best).most_common(1)[0][0],
+    }
+    return best, fields
+
+
+def _norm(s: str) -> str:
+    return " ".join(str(s or "").lower().split())
+
+
+class ApiCapture:
+    """Collects product endpoints from a browser crawl; save() persists them for replay."""
+
+    def __init__(self, base: str):
+        self.base = base
+        self.current: int | None = None
+        self.endpoints: dict[str, list[str]] = {}
+        self.fields: dict | None = None
+        self.samples: dict[str, dict] = {}   # normalized name -> product json
+        self.templates: Counter = Counter()
+        self.headers: dict[str, str] | None = None   # of the first product XHR
+
+    def on_response(self, resp) -> None:
+        try:
+            req = resp.request
+            if self.current is None or req.method != "GET" or req.resource_type not in ("xhr", "fetch"):
+                return
+            if not resp.ok or "json" not in (resp.headers.get("content-type") or ""):
+                return
+            products, fields = find_products(resp.json())
+        except Exception:
+            return
+        if not products:
+            return
+        urls = self.endpoints.setdefault(str(self.current), [])
+        if resp.url not in urls:
+            urls.append(resp.url)
+        self.fields = self.fields or fields
+        if self.headers is None:
+            self.headers = {k: v for k, v in req.headers.items()
+                            if k.lower() not in SKIP_HEADERS and not k.startswith(":")}
+        for p in products:
+            self.samples[_norm(p.get(fields["name"]))] = p
+
+    def learn(self, cards: list[dict]) -> None:
+        """Infer the product-link pattern by matching rendered cards to captured products."""
+        for card in cards:
+            href, product = card.get("href"), self.samples.get(_norm(card.get("name")))
+            if not href or not product:
+                continue
+            candidates = [(k, str(v)) for k, v in product.items()
+                          if isinstance(v, (str, int)) and len(str(v)) >= 2 and str(v) in href]
+            if candidates:
+                key, value = max(candidates, key=lambda kv: len(kv[1]))
+                self.templates[href.replace(value, "{" + key + "}", 1)] += 1
+
+    def save(self, cookies: list[dict]) -> bool:
+        """Persist the capture with the browser context's cookies (Playwright context.cookies())."""
+        if not self.endpoints or not self.fields or not self.templates:
+            return False
+        state = {
+            "captured_at": time.time(),
+            "base": self.base,
+            "endpoints": self.endpoints,
+            "fields": self.fields,
+            "href_template": self.templates.most_common(1)[0][0],
+            "headers": self.headers or {},
+            "cookies": [{k: c.get(k) for k in ("name", "value", "domain", "path")} for c in cookies],
+        }
+        tmp = f"{VIVAFRESH_API_STATE}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1)
+        os.replace(tmp, VIVAFRESH_API_STATE)
+        return True
+
+
+def load_state() -> dict | None:
+    """Captured state if replay is enabled and the capture is complete and fresh enough."""
+    if not VIVAFRESH_API:
+        return None
+    try:
+        with open(VIVAFRESH_API_STATE, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - state.get("captured_at", 0) > VIVAFRESH_API_MAX_AGE_D * 86400:
+        return None
+    if not state.get("endpoints") or not state.get("fields") or not state.get("href_template"):
+        return None
+    if "cookies" not in state:
+        return None  # captured without the city session: replay could return another city's prices
+    return state
+
+
+def _next_page(url: str) -> str | None:
+    parts = urlparse(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    for i, (k, v) in enumerate(query):
+        if k in PAGE_PARAMS and v.isdigit():
+            query[i] = (k, str(int(v) + 1))
+            return urlunparse(parts._replace(query=urlencode(query)))
+    return None
+
+
+async def _products(client: httpx.AsyncClient, url: str, fields: dict) -> list[dict]:
+    r = await get_with_retry(client, url, timeout=30)
+    if r.status_code != 200:
+        raise ContractChanged(f"HTTP {r.status_code} for {url}")
+    try:
+        products, got = find_products(r.json())
+    except ValueError:
+        raise ContractChanged(f"non-JSON body for {url}")
+    if products and got != fields:
+        raise ContractChanged(f"fields {got} != {fields} for {url}")
+    return products
+
+
+async def fetch_rows(state: dict, parse_price) -> list[tuple[str, float, str]]:
+    """(name, price_eur, href) for every captured category; raises ContractChanged."""
+    fields, template = state["fields"], state["href_template"]
+    headers = {"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) kpc/1.1", "Accept": "application/json"}
+    headers.update(state.get("headers") or {})
+    cookies = httpx.Cookies()
+    for c in state.get("cookies") or []:
+        if c.get("name"):
+            cookies.set(c["name"], c.get("value") or "", domain=c.get("domain") or "", path=c.get("path") or "/")
+    rows: list[tuple[str, float, str]] = []
+
+    def collect(products: list[dict]) -> int:
+        n = 0
+        for p in products:
+            name = str(p.get(fields["name"]) or "").strip()
+            price = parse_price(str(p.get(fields["price"])))
+            try:
+                href = template.format(**p)
+            except (KeyError, IndexError, ValueError):
+                raise ContractChanged(f"link field missing for {name!r}")
+            if name and price is not None:
+                rows.append((name, price, href))
+                n += 1
+        return n
+
+    async with httpx.AsyncClient(headers=headers, cookies=cookies, follow_redirects=True) as client:
+        for lvl2, urls in state["endpoints"].items():
+            found = 0
+            last: list[dict] = []
+            for url in urls:
+                last = await _products(client, url, fields)
+                found += collect(last)
+
+            # keep paging past the last captured page until one comes back empty (or repeats)
+            url = urls[-1]
+            for _ in range(MAX_EXTRA_PAGES):
+                url = _next_page(url)
+                if not url or url in urls:
+                    break
+                products = await _products(client, url, fields)
+                if not products or products == last:
+                    break
+                found += collect(products)
+                last = products
+
+            if not found:
+                raise ContractChanged(f"no products for lvl2={lvl2}")
+    return rows
@@ -13,8 +13,10 @@ from sqlalchemy import func
 from datetime import datetime
 
 from ..models import Store, StoreItem, Price
-from ..utils.pdf_parser import parse_generic_flyer
-from ..utils.normalize import parse_size_and_fat, unit_price_eur
+from ..utils.pdf_parser import parse_generic_flyer_async
+from ..utils import flyer_registry
+from ..utils.normalize import parse_size_and_fat, unit_price_eur, item_attributes
+from ._http import HttpCache
 
 DEFAULT_LISTING = "https://etc-ks.com/magazina.php"
 ETC_LISTING = os.getenv("ETC_LISTING", DEFAULT_LISTING)
@@ -37,17 +39,32 @@ async def crawl_etc_flyer(db: Session, city: str = "Prishtina"):
 
     print(f"[etc-flyer] found {len(pdf_urls)} pdf links")
     processed = 0
+    skipped = 0
+    cache = HttpCache("etc-flyer")
     async with httpx.AsyncClient(headers={"User-Agent": UA}, follow_redirects=True) as s:
         for pdf_url in pdf_urls:
             path = None
             try:
-                r = await s.get(pdf_url, timeout=90)
-                ct = (r.headers.get("content-type") or "").lower()
+                r = await cache.get(s, pdf_url, timeout=90)
+                ct = r.content_type.lower()
                 if r.status_code != 200 or "pdf" not in ct: continue
-                fd, path = tempfile.mkstemp(suffix=".pdf")
-                _os.write(fd, r.content); _os.close(fd)
-                
-                items, (vfrom, vto) = parse_generic_flyer(path)
+                if r.unchanged:
+                    skipped += 1
+                    continue
+                digest = flyer_registry.content_hash(r.content)
+                known = flyer_registry.lookup(db, digest)
+                if known is not None and known.items:
+                    items, (vfrom, vto) = flyer_registry.parsed_result(known)
+                    print(f"[etc-flyer] reusing {len(items)} items of known flyer {digest[:12]}")
+                else:
+                    fd, path = tempfile.mkstemp(suffix=".pdf")
+                    _os.write(fd, r.content); _os.close(fd)
+
+                    items, (vfrom, vto) = await parse_generic_flyer_async(path, "etc_pdf")
+                    # an empty parse may be a transient OCR failure; leave it unrecorded so it is retried
+                    if items:
+                        flyer_registry.record(db, digest, store_id=store.id, source_url=pdf_url, kind="pdf",
+                                              items=items, valid=(vfrom, vto))
             except Exception:
                 items, vfrom, vto = [], None, None
             finally:
@@ -60,7 +77,7 @@ async def crawl_etc_flyer(db: Session, city: str = "Prishtina"):
 
                 item = db.query(StoreItem).filter_by(store_id=store.id, raw_name=name).one_or_none()
                 if not item:
-                    item = StoreItem(store_id=store.id, external_id=name[:64], raw_name=name, url=pdf_url, category=it.get("category"))
+                    item = StoreItem(store_id=store.id, external_id=name[:64], raw_name=name, url=pdf_url, category=it.get("category"), **item_attributes(name))
                     db.add(item); db.flush(); db.refresh(item)
                 
                 up = unit_price_eur(price, size_ml_g, unit_hint)
@@ -93,4 +110,6 @@ async def crawl_etc_flyer(db: Session, city: str = "Prishtina"):
                     ))
                 processed += 1
             db.commit()
-    print(f"[etc-flyer] processed {processed} items")
+            if items:
+                cache.mark_processed(pdf_url)
+    print(f"[etc-flyer] processed {processed} items, {skipped} unchanged flyers skipped")
@@ -9,7 +9,7 @@ from urllib.parse import urlparse
 from dotenv import load_dotenv
 from PIL import Image  # For aspect-ratio check
 from datetime import datetime
-from ..utils.normalize import canon_store, parse_fat_pct, classify
+from ..utils.normalize import canon_store, item_attributes
 
 # --- PATCH A: Constants & helpers START ---
 import datetime as dt
@@ -18,9 +18,23 @@ import json
 # Tunables (also read from env if set)
 DEFAULT_WANT_N = int(os.getenv("FB_WANT_N", "12"))
 MAX_AGE_DAYS = int(os.getenv("FB_MAX_AGE_DAYS", "10"))  # skip photos older than this
+# image pipeline: parallel downloads, queue depth between stages, images per DB commit
+FB_DOWNLOAD_CONCURRENCY = int(os.getenv("FB_DOWNLOAD_CONCURRENCY", "4"))
+FB_QUEUE_SIZE = int(os.getenv("FB_QUEUE_SIZE", "4"))
+FB_WRITE_BATCH = int(os.getenv("FB_WRITE_BATCH", "5"))
+# skip photos whose id is already in the fb_photos ledger (processed on an earlier run)
+FB_LEDGER = os.getenv("FB_LEDGER", "1") == "1"
+# pre-OCR classifier: header size, downscaled image stats and a low-res OCR probe
+FB_PREFILTER = os.getenv("FB_PREFILTER", "1") == "1"
+# pre-filter verdicts are kept in the ledger only; a rejected photo is probed again after this many days
+FB_PREFILTER_RECHECK_D = float(os.getenv("FB_PREFILTER_RECHECK_D", "30"))
+PREFILTER_MIN_PIXELS = 300_000   # same floor as the Playwright grid collector
+PREFILTER_MIN_GLYPHS = int(os.getenv("FB_PREFILTER_MIN_GLYPHS", "40"))
 
 # Heuristics for product-vs-greeting
 PRICE_PAT = re.compile(r'(\d+[.,]?\d*)\s?(€|eur|euro)\b', re.I)
+PRICE_GLYPH_PAT = re.compile(r'€|\b\d{1,3}[.,]\d{2}\b')  # what a low-res probe still reads of a price
+APP_PROMO_PAT = re.compile(r'\b(app store|google play|shkarko aplikacionin)\b', re.I)
 PCT_PAT   = re.compile(r'\b\d{1,2}\s?%')  # 5%, 10 %, etc.
 UNIT_PAT  = re.compile(r'\b(\d+(\.\d+)?)\s?(kg|g|l|ml)\b', re.I)
 
@@ -80,13 +94,30 @@ async def _get_with_dns_retry(s: httpx.AsyncClient, url: str, **kw):
             await anyio.sleep(0.7 * (i+1))
 # --- END NEW FUNCTION ---
 
-async def _extract_post_timestamp(s, href: str) -> dt.datetime | None:
+async def _extract_post_timestamp(s, href: str, slug: str | None = None) -> dt.datetime | None:
     """
     Return UTC datetime for a photo/story link (m.facebook.com or www.facebook.com).
-    Tries several strategies because FB markup varies by surface, locale, and session.
+    Photos seen on an earlier run are answered from fb_photos without loading the page.
     """
     if not href:
         return None
+    photo_id = _extract_photo_id_from_referer(href)
+    epoch = fb_photos.posted_at(photo_id)
+    if epoch is not None:
+        return dt.datetime.utcfromtimestamp(epoch)
+
+    ts = await _fetch_post_timestamp(s, href)
+    if ts is not None:
+        if ts.tzinfo is not None:
+            ts = ts.astimezone(dt.timezone.utc).replace(tzinfo=None)
+        fb_photos.remember_posted_at(photo_id, int(ts.replace(tzinfo=dt.timezone.utc).timestamp()), slug)
+    return ts
+
+async def _fetch_post_timestamp(s, href: str) -> dt.datetime | None:
+    """
+    Load the photo page and parse its publish time (naive UTC).
+    Tries several strategies because FB markup varies by surface, locale, and session.
+    """
     url = href
     if url.startswith("/"):
         url = "https://m.facebook.com" + url
@@ -165,9 +196,12 @@ async def _extract_post_timestamp(s, href: str) -> dt.datetime | None:
 
 
 from ..models import Store, StoreItem, Price
-from ..utils.pdf_parser import parse_text_for_items
+from ..utils.pdf_parser import parse_pages_for_items
+from ..utils.flyer_layout import words_to_text
 from ..utils.normalize import parse_size_and_fat, unit_price_eur
-from ..utils.image_ocr import ocr_image_to_text
+from ..utils.image_ocr import OCR_WORKERS, ocr_image_to_words, ocr_probe_text, run_on_ocr_pool_async
+from ..utils.image_prefilter import image_size, image_stats
+from ..utils import flyer_registry, fb_photos
 
 logger = logging.getLogger(__name__)
 load_dotenv()
@@ -219,6 +253,168 @@ def _extract_photo_id_from_referer(referer: str) -> Optional[str]:
         pass
     return None
 
+def _reject_reason(slug: str, path: str, text: str, is_png: bool) -> Optional[tuple[str, str]]:
+    """(ledger outcome, log message) if an OCR'd image is not a product flyer, None to keep it."""
+    # Aspect-ratio check for wide banners
+    try:
+        w, h = Image.open(path).size
+        if w > 1.6 * h and not looks_like_product(text):
+            return "banner", f"very wide banner ({w}x{h}), not product-like"
+    except Exception as img_e:
+        logger.warning(f"[{slug}] could not read image dimensions: {img_e}")
+
+    # If it's a PNG banner AND text doesn't look like a product → skip
+    if is_png and not looks_like_product(text):
+        return "banner", "PNG and not product-like"
+
+    # Filter out app-store/download promos explicitly
+    if APP_PROMO_PAT.search(text):
+        return "app-promo", "looks like app-badge/download promo"
+
+    # QUICK reject: greetings or no product signals at all
+    if looks_like_greeting(text):
+        return "greeting", "looks like greeting"
+    return None
+
+def _prefilter(path: str, is_png: bool) -> Optional[tuple[str, str]]:
+    """
+    Cheap verdict before full OCR: (ledger outcome, log message) to reject, None to OCR.
+    Only rejects on clear signals; anything with price glyphs in the probe goes to full OCR.
+    """
+    w, h = image_size(path)
+    if w * h < PREFILTER_MIN_PIXELS:
+        return "pre-small", f"pre-filter: too small for a flyer ({w}x{h})"
+
+    st = image_stats(path)
+    if st.glyphs < PREFILTER_MIN_GLYPHS:
+        return "pre-no-text", (f"pre-filter: {st.glyphs} glyph-like blobs, edges {st.edge_density:.3f}, "
+                               f"colorfulness {st.colorfulness:.0f}")
+
+    text = ocr_probe_text(path)
+    if PRICE_GLYPH_PAT.search(text):
+        return None
+    if APP_PROMO_PAT.search(text):
+        return "pre-app-promo", "pre-filter: app-badge/download promo"
+    if looks_like_greeting(text):
+        return "pre-greeting", "pre-filter: greeting, no prices"
+    if w > 1.6 * h and not looks_like_product(text):
+        return "pre-banner", f"pre-filter: very wide banner ({w}x{h}), no prices"
+    if is_png and not looks_like_product(text):
+        return "pre-banner", "pre-filter: PNG, no product signals"
+    return None
+
+def _ocr_image(path: str, slug: str, is_png: bool):
+    """OCR + parse one downloaded image (runs on the OCR pool) -> (reject, items, valid)."""
+    if FB_PREFILTER:
+        try:
+            reject = _prefilter(path, is_png)
+        except Exception as e:
+            logger.warning(f"[{slug}] pre-filter failed, running full OCR: {e}")
+            reject = None
+        if reject:
+            return reject, [], (None, None)
+
+    words = ocr_image_to_words(path, "facebook")
+    text = words_to_text(words)
+    reject = _reject_reason(slug, path, text, is_png)
+    items, valid = ([], (None, None)) if reject else parse_pages_for_items([words])
+
+    # If OCR didn’t yield parseable items, still try a soft keep only if it still looks like a product
+    if not reject and not items and not looks_like_product(text):
+        reject = "not-product", "no items and not product-like"
+    return reject, items, valid
+
+async def _download_image(s: httpx.AsyncClient, slug: str, url: str, referer: str, fb_headers: dict) -> Optional[str]:
+    """Fetch the RAW fbcdn URL into a temp file, with the Playwright / hardened-header fallbacks."""
+    request_headers = fb_headers.copy()
+    request_headers["Referer"] = referer  # photo page as referer
+
+    # IMPORTANT: request the EXACT (raw) fbcdn URL
+    r = await s.get(url, headers=request_headers)
+
+    if r.status_code == 403:
+        logger.warning("Got 403 for %s, retrying via Playwright…", url)
+        from ._playwright_thread import download_fb_image_sync
+        path = await anyio.to_thread.run_sync(download_fb_image_sync, url, referer, FB_COOKIE)
+        if path:
+            return path
+
+        logger.warning("Playwright fallback failed, trying generic referer with hardened headers...")
+        request_headers.update({
+            "Referer": "https://m.facebook.com/",
+            "Origin": "https://m.facebook.com",
+            "Sec-Fetch-Dest": "image",
+            "Sec-Fetch-Mode": "no-cors",
+            "Sec-Fetch-Site": "same-site",
+            "sec-ch-ua": '"Chromium";v="124", "Not.A/Brand";v="24"',
+            "sec-ch-ua-mobile": "?0",
+            "sec-ch-ua-platform": '"Windows"',
+        })
+
+        r = await s.get(url, headers=request_headers)  # RAW url
+        if r.status_code != 200:
+            logger.error("[%s] still %d for %s after all fallbacks; skipping.", slug, r.status_code, url)
+            return None
+    else:
+        r.raise_for_status()
+
+    fd, path = tempfile.mkstemp(suffix=".jpg")
+    os.write(fd, r.content); os.close(fd)
+    return path
+
+def _store_items(db: Session, store: Store, items: list, url: str, referer: str, valid) -> int:
+    """Find-or-create the StoreItems and add promo Prices; flushed, committed by the caller."""
+    vfrom, vto = valid
+    ext_id = _extract_photo_id_from_referer(referer)
+    for it in items:
+        raw, price = it["raw_name"], it["price_eur"]
+        brand = it.get("brand")
+        category = it.get("category")
+
+        size_ml_g, unit_hint, _ = parse_size_and_fat(raw)
+
+        # find-or-create StoreItem (prefer external_id)
+        item = None
+        if ext_id:
+            item = db.query(StoreItem).filter_by(store_id=store.id, external_id=ext_id).one_or_none()
+        if not item:
+            item = db.query(StoreItem).filter_by(store_id=store.id, raw_name=raw).one_or_none()
+        if not item:
+            item = StoreItem(
+                store_id=store.id,
+                raw_name=raw,
+                external_id=ext_id,
+                url=referer or url,   # permalink preferred
+                brand=brand,
+                category=category,
+                **item_attributes(raw)
+            )
+            db.add(item); db.flush()
+        else:
+            # Backfill external_id & permalink
+            if ext_id and not getattr(item, "external_id", None):
+                item.external_id = ext_id
+            if referer and item.url != referer:
+                item.url = referer
+            if brand and not getattr(item, "brand", None):
+                item.brand = brand
+            if category and not getattr(item, "category", None):
+                item.category = category
+
+        up = unit_price_eur(price, size_ml_g, unit_hint)
+        db.add(Price(
+            store_item_id=item.id,
+            store_id=store.id,  # keep store_id filled
+            price_eur=price,
+            unit_price=up,
+            currency="€",
+            promo_flag=True,
+            promo_valid_from=vfrom,
+            promo_valid_to=vto,
+            collected_at=datetime.utcnow()
+        ))
+    return len(items)
+
 async def crawl_facebook_flyer(
     db: Session,
     slug: str,
@@ -228,6 +424,14 @@ async def crawl_facebook_flyer(
     scroll_pages: int = 6,
     want_n: int = DEFAULT_WANT_N,
 ) -> None:
+    """
+    Staged pipeline: FB_DOWNLOAD_CONCURRENCY download tasks (recency check + image fetch) feed
+    the OCR stage, which runs on the shared OCR process pool; a single writer task owns every
+    DB write and commits every FB_WRITE_BATCH images. Stages are joined by bounded queues, so
+    downloads wait on OCR instead of piling temp files up, and network waits overlap OCR.
+    Photos already in the fb_photos ledger are dropped right after discovery (FB_LEDGER=0
+    reprocesses them).
+    """
     store = db.query(Store).filter_by(slug=slug).one_or_none()
     if not store:
         store = Store(name=store_name, slug=slug, city=city)
@@ -238,11 +442,33 @@ async def crawl_facebook_flyer(
         fb_page_url, scroll_pages=scroll_pages, want_n=want_n
     )
 
+    # publish times are queued in fb_photos under the store slug (download stage) and, during
+    # discovery, under the Facebook page slug; this crawl flushes only those two queues
+    ts_slugs = (slug, _extract_page_slug(fb_page_url))
+    flushed: dict = {}
+    try:
+        flushed = fb_photos.flush_pending(db, *ts_slugs)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        fb_photos.requeue_pending(flushed)
+        logger.warning(f"[{slug}] storing photo timestamps failed, kept queued for the next batch: {e}")
+
     if not image_pairs:
         logger.warning(f"[{slug}] no flyer images found")
         return
 
-    processed = 0
+    if FB_LEDGER:
+        done = fb_photos.processed_ids(
+            db, [_extract_photo_id_from_referer(ref) for _, ref in image_pairs],
+            prefilter_max_age=dt.timedelta(days=FB_PREFILTER_RECHECK_D) if FB_PREFILTER else None,
+        )
+        if done:
+            image_pairs = [(u, ref) for u, ref in image_pairs if _extract_photo_id_from_referer(ref) not in done]
+            logger.info(f"[{slug}] {len(done)} photos already processed on earlier runs, {len(image_pairs)} new")
+        if not image_pairs:
+            return
+
     fb_headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
         "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
@@ -251,169 +477,142 @@ async def crawl_facebook_flyer(
     if FB_COOKIE:
         fb_headers["Cookie"] = FB_COOKIE
 
-    async with httpx.AsyncClient(headers=fb_headers, timeout=120, follow_redirects=True, http2=True) as s:
-        for url, referer in image_pairs:
+    pending: asyncio.Queue = asyncio.Queue()
+    for pair in image_pairs:
+        pending.put_nowait(pair)
+    to_ocr: asyncio.Queue = asyncio.Queue(maxsize=FB_QUEUE_SIZE)     # (url, referer, path, is_png)
+    to_write: asyncio.Queue = asyncio.Queue(maxsize=FB_QUEUE_SIZE)   # (url, referer, digest, reject, items, valid, known)
+    n_download = max(1, FB_DOWNLOAD_CONCURRENCY)
+    n_ocr = max(1, min(OCR_WORKERS, len(image_pairs)))
+    seen_digests: set[str] = set()
+    processed = 0
+
+    async def download(s: httpx.AsyncClient) -> None:
+        while not pending.empty():
+            url, referer = pending.get_nowait()
             # Require a usable referer (photo permalink) so we can timestamp-filter and dedupe correctly
             if not isinstance(referer, str) or not ("/photo.php" in referer or "/photos/" in referer):
                 logger.info(f"[{slug}] skipping cdn-only image (no photo permalink referer)")
                 continue
-
-            path = None
             try:
-                # Before OCR, cheaply reject obvious non-flyer PNGs unless we later detect product signals
-                is_png = url.lower().endswith(".png")
-
                 # --- PATCH C: Recency filter START ---
-                is_photo_ref = isinstance(referer, str) and ("/photo.php" in referer or "/photos/" in referer)
-                if is_photo_ref:
-                    try:
-                        ts = await _extract_post_timestamp(s, referer)
-                        if ts:
-                            age_days = (dt.datetime.utcnow() - ts).days
-                            if age_days > MAX_AGE_DAYS:
-                                logger.info(f"[{slug}] skip {referer} (age {age_days}d > {MAX_AGE_DAYS})")
-                                continue
-                    except Exception as _:
-                        pass
-                # --- PATCH C: Recency filter END ---
-
-                request_headers = fb_headers.copy()
-                request_headers["Referer"] = referer  # photo page as referer
-
-                # IMPORTANT: request the EXACT (raw) fbcdn URL
-                r = await s.get(url, headers=request_headers)
-
-                if r.status_code == 403:
-                    logger.warning("Got 403 for %s, retrying via Playwright…", url)
-                    from ._playwright_thread import download_fb_image_sync
-                    path = await anyio.to_thread.run_sync(download_fb_image_sync, url, referer, FB_COOKIE)
-
-                    if not path:
-                        logger.warning("Playwright fallback failed, trying generic referer with hardened headers...")
-                        request_headers.update({
-                            "Referer": "https://m.facebook.com/",
-                            "Origin": "https://m.facebook.com",
-                            "Sec-Fetch-Dest": "image",
-                            "Sec-Fetch-Mode": "no-cors",
-                            "Sec-Fetch-Site": "same-site",
-                            "sec-ch-ua": '"Chromium";v="124", "Not.A/Brand";v="24"',
-                            "sec-ch-ua-mobile": "?0",
-                            "sec-ch-ua-platform": '"Windows"',
-                        })
-
-                        r_retry = await s.get(url, headers=request_headers)  # RAW url
-                        if r_retry.status_code == 200:
-                            fd, path = tempfile.mkstemp(suffix=".jpg")
-                            os.write(fd, r_retry.content); os.close(fd)
-                        else:
-                            logger.error("[%s] still %d for %s after all fallbacks; skipping.", slug, r_retry.status_code, url)
+                try:
+                    ts = await _extract_post_timestamp(s, referer, slug)
+                    if ts:
+                        age_days = (dt.datetime.utcnow() - ts).days
+                        if age_days > MAX_AGE_DAYS:
+                            logger.info(f"[{slug}] skip {referer} (age {age_days}d > {MAX_AGE_DAYS})")
                             continue
-                else:
-                    r.raise_for_status()
-                    fd, path = tempfile.mkstemp(suffix=".jpg")
-                    os.write(fd, r.content); os.close(fd)
+                except Exception as _:
+                    pass
+                # --- PATCH C: Recency filter END ---
 
+                path = await _download_image(s, slug, url, referer, fb_headers)
                 if not path:
                     logger.error("Could not download image at %s after all fallbacks.", url)
                     continue
-
-                text = ocr_image_to_text(path) or ""
-
-                # Aspect-ratio check for wide banners
+                # Before OCR, cheaply reject obvious non-flyer PNGs unless we later detect product signals
                 try:
-                    w, h = Image.open(path).size
-                    if w > 1.6 * h and not looks_like_product(text):
-                        logger.info(f"[{slug}] very wide banner ({w}x{h}), not product-like; skipping")
-                        continue
-                except Exception as img_e:
-                    logger.warning(f"[{slug}] could not read image dimensions: {img_e}")
-
-                # If it's a PNG banner AND text doesn't look like a product → skip
-                if is_png and not looks_like_product(text):
-                    logger.info(f"[{slug}] PNG and not product-like; skipping")
-                    continue
+                    await to_ocr.put((url, referer, path, url.lower().endswith(".png")))
+                except asyncio.CancelledError:
+                    os.unlink(path)
+                    raise
+            except Exception as e:
+                logger.exception(f"[{slug}] failed downloading image {url}: {e}")
 
-                # Filter out app-store/download promos explicitly
-                if re.search(r'\b(app store|google play|shkarko aplikacionin)\b', text, re.I):
-                    logger.info(f"[{slug}] looks like app-badge/download promo; skipping")
+    async def ocr() -> None:
+        while (job := await to_ocr.get()) is not None:
+            url, referer, path, is_png = job
+            try:
+                digest = flyer_registry.file_hash(path)
+                if digest in seen_digests:
+                    reject = "duplicate", f"image {digest[:12]} already seen this run"
+                    await to_write.put((url, referer, digest, reject, [], (None, None), True))
                     continue
+                seen_digests.add(digest)
 
-                # QUICK reject: greetings or no product signals at all
-                if looks_like_greeting(text):
-                    logger.info(f"[{slug}] looks like greeting; skipping")
+                known = flyer_registry.lookup(db, digest)
+                if known is not None and known.status != "parsed":
+                    reject = "duplicate", f"image {digest[:12]} rejected on an earlier run"
+                    await to_write.put((url, referer, digest, reject, [], (None, None), True))
                     continue
-
-                items, (vfrom, vto) = parse_text_for_items(text)
-
-                # If OCR didn’t yield parseable items, still try a soft keep only if it still looks like a product
-                if not items and not looks_like_product(text):
-                    logger.info(f"[{slug}] no items and not product-like; skipping")
+                if known is not None:
+                    items, valid = flyer_registry.parsed_result(known)
+                    logger.info(f"[{slug}] reusing {len(items)} items of known image {digest[:12]}")
+                    await to_write.put((url, referer, digest, None, items, valid, True))
                     continue
 
-                logger.info(f"[{slug}] parsed {len(items)} items from one image")
-
-                for it in items:
-                    raw, price = it["raw_name"], it["price_eur"]
-                    brand = it.get("brand")
-                    category = it.get("category")
-
-                    size_ml_g, unit_hint, _ = parse_size_and_fat(raw)
-                    ext_id = _extract_photo_id_from_referer(referer)
-
-                    # find-or-create StoreItem (prefer external_id)
-                    item = None
-                    if ext_id:
-                        item = db.query(StoreItem).filter_by(store_id=store.id, external_id=ext_id).one_or_none()
-                    if not item:
-                        item = db.query(StoreItem).filter_by(store_id=store.id, raw_name=raw).one_or_none()
-                    if not item:
-                        item = StoreItem(
-                            store_id=store.id,
-                            raw_name=raw,
-                            external_id=ext_id,
-                            url=referer or url,   # permalink preferred
-                            brand=brand,
-                            category=category,
-                            category_norm=classify(raw),
-                            fat_pct=parse_fat_pct(raw)
-                        )
-                        db.add(item); db.commit(); db.refresh(item)
-                    else:
-                        changed = False
-                        # Backfill external_id & permalink
-                        if ext_id and not getattr(item, "external_id", None):
-                            item.external_id = ext_id; changed = True
-                        if referer and item.url != referer:
-                            item.url = referer; changed = True
-                        if brand and not getattr(item, "brand", None):
-                            item.brand = brand; changed = True
-                        if category and not getattr(item, "category", None):
-                            item.category = category; changed = True
-                        if changed:
-                            db.commit()
-
-                    up = unit_price_eur(price, size_ml_g, unit_hint)
-                    price_obj = Price(
-                        store_item_id=item.id,
-                        store_id=store.id,  # keep store_id filled
-                        price_eur=price,
-                        unit_price=up,
-                        currency="€",
-                        promo_flag=True,
-                        promo_valid_from=vfrom,
-                        promo_valid_to=vto,
-                        collected_at=datetime.utcnow()
-                    )
-                    db.add(price_obj)
-                    processed += 1
-                db.commit()
-
+                reject, items, valid = await run_on_ocr_pool_async(_ocr_image, path, slug, is_png)
+                await to_write.put((url, referer, digest, reject, items, valid, False))
             except Exception as e:
                 logger.exception(f"[{slug}] failed processing image {url}: {e}")
             finally:
-                if path and os.path.exists(path):
+                if os.path.exists(path):
                     os.unlink(path)
 
+    def write_batch(batch: list) -> None:
+        # applied in one synchronous block: the SQLite write lock is never held across an await
+        nonlocal processed
+        flushed: dict = {}
+        try:
+            flushed = fb_photos.flush_pending(db, *ts_slugs)  # publish times found by the download stage
+            stored = 0
+            for url, referer, digest, reject, items, valid, known in batch:
+                # pre-filter verdicts are heuristic: ledger only, so the registry never pins an image as rejected
+                if not known and not (reject and reject[0].startswith("pre-")):
+                    flyer_registry.record(db, digest, store_id=store.id, source_url=referer or url, kind="image",
+                                          items=items, valid=valid,
+                                          status="rejected" if reject else "parsed")
+                if reject:
+                    logger.info(f"[{slug}] {reject[1]}; skipping")
+                else:
+                    logger.info(f"[{slug}] parsed {len(items)} items from one image")
+                    stored += _store_items(db, store, items, url, referer, valid)
+                fb_photos.record_processed(db, _extract_photo_id_from_referer(referer), slug=slug,
+                                           outcome=reject[0] if reject else "items", n_items=len(items))
+            db.commit()
+            processed += stored
+        except Exception as e:
+            db.rollback()
+            fb_photos.requeue_pending(flushed)
+            logger.exception(f"[{slug}] failed storing a batch of {len(batch)} images: {e}")
+
+    async def write() -> None:
+        batch: list = []
+        while (res := await to_write.get()) is not None:
+            batch.append(res)
+            if len(batch) >= FB_WRITE_BATCH:
+                write_batch(batch)
+                batch = []
+        write_batch(batch)
+
+    async def download_stage(s: httpx.AsyncClient) -> None:
+        await asyncio.gather(*(download(s) for _ in range(n_download)))
+        for _ in range(n_ocr):
+            await to_ocr.put(None)
+
+    async def ocr_stage() -> None:
+        await asyncio.gather(*(ocr() for _ in range(n_ocr)))
+        await to_write.put(None)
+
+    async with httpx.AsyncClient(headers=fb_headers, timeout=120, follow_redirects=True, http2=True) as s:
+        stages = [asyncio.create_task(download_stage(s)), asyncio.create_task(ocr_stage()),
+                  asyncio.create_task(write())]
+        try:
+            done, _ = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+            for t in done:
+                t.result()  # re-raise a failed stage
+        finally:
+            # a failed or cancelled stage would leave the others blocked on the queues forever
+            for t in stages:
+                t.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            # drop temp files still waiting for OCR
+            while not to_ocr.empty():
+                job = to_ocr.get_nowait()
+                if job is not None and os.path.exists(job[2]):
+                    os.unlink(job[2])
+
     logger.info(f"[{slug}] processed {processed} total items")
 
 def _pick_og_image(soup: BeautifulSoup) -> str | None:
@@ -516,11 +715,11 @@ async def _fetch_full_from_photo_page(s, href: str) -> str | None:
         return img  # raw
     return None
 
-async def _ts_for_pair(s, referer: str) -> Optional[dt.datetime]:
+async def _ts_for_pair(s, referer: str, slug: Optional[str] = None) -> Optional[dt.datetime]:
     if not referer:
         return None
     try:
-        return await _extract_post_timestamp(s, referer)
+        return await _extract_post_timestamp(s, referer, slug)
     except Exception:
         return None
 
@@ -641,7 +840,7 @@ async def _get_images_from_mbasic(page_slug: str, max_pages: int = 6,
         # 3) Stamp timestamps and sort newest → oldest
         pairs_with_ts: list[tuple[Optional[dt.datetime], tuple[str, str]]] = []
         for u, ref in results:
-            ts = await _ts_for_pair(s, ref)
+            ts = await _ts_for_pair(s, ref, page_slug)
             pairs_with_ts.append((ts, (u, ref)))
 
         # put None timestamps at the end
@@ -728,7 +927,7 @@ async def _get_offer_images_from_facebook(page_url: str, scroll_pages: int = 6,
         pairs_with_ts: list[tuple[Optional[dt.datetime], tuple[str, str]]] = []
         for u, ref in pairs:
             # require a usable photo permalink to get a timestamp; cdn-only gets None
-            ts = await _ts_for_pair(s, ref) if (isinstance(ref, str) and ("/photo.php" in ref or "/photos/" in ref)) else None
+            ts = await _ts_for_pair(s, ref, slug) if (isinstance(ref, str) and ("/photo.php" in ref or "/photos/" in ref)) else None
             pairs_with_ts.append((ts, (u, ref)))
 
     # newest first; None at the end
@@ -2,17 +2,19 @@
 from __future__ import annotations
 
 import asyncio
+import os
 import re
 from datetime import date, datetime
+import anyio
 import httpx
 from bs4 import BeautifulSoup
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import datetime
-from ..utils.normalize import classify, parse_fat_pct
 
 from ..models import Store, StoreItem, Price
-from ..utils.normalize import parse_size_and_fat, unit_price_eur
+from ..utils.normalize import parse_size_and_fat, unit_price_eur, item_attributes
+from ._http import HostRateLimiter, HttpCache, get_with_retry
 
 BASE = "https://maxiks.shop"
 
@@ -33,11 +35,16 @@ LISTING_PATHS = [
 
 HEADERS = {"User-Agent": "kosovo-price-compare/1.0 (+https://yourapp.example.com)"}
 
+# detail pages are fetched concurrently; MAXI_RPS caps request starts per second on the shop
+MAXI_CONCURRENCY = int(os.getenv("MAXI_CONCURRENCY", "6"))
+MAXI_RPS = float(os.getenv("MAXI_RPS", "4"))
+MAXI_WRITE_BATCH = int(os.getenv("MAXI_WRITE_BATCH", "25"))
 
-async def fetch(client: httpx.AsyncClient, url: str) -> str | None:
+
+async def fetch(client: httpx.AsyncClient, url: str, limiter: HostRateLimiter | None = None) -> str | None:
     """Fetch a page and return its HTML or None on failure."""
     try:
-        resp = await client.get(url, timeout=30)
+        resp = await get_with_retry(client, url, limiter=limiter, timeout=30)
         resp.raise_for_status()
         return resp.text
     except (httpx.HTTPStatusError, httpx.RequestError) as e:
@@ -45,6 +52,78 @@ async def fetch(client: httpx.AsyncClient, url: str) -> str | None:
         return None
 
 
+def _listing_links(html: str) -> list[str]:
+    soup = BeautifulSoup(html, "lxml")
+    out = []
+    for a in soup.select('a[href*="/product/"]'):
+        href = a.get("href")
+        if href:
+            out.append(href if href.startswith("http") else f"{BASE}{href}")
+    return out
+
+
+def _parse_product(html: str) -> tuple[str, float] | None:
+    """(name, price_eur) from a product page; runs in a worker thread."""
+    soup = BeautifulSoup(html, "lxml")
+    title_el = soup.select_one("h4.p-title-main, h4.mb-2.p-title-main")
+    price_el = soup.select_one("#main_price")
+    if not title_el or not price_el:
+        return None
+    price_text = price_el.get_text(strip=True).replace("€", "").replace(",", ".")
+    try:
+        return title_el.get_text(strip=True), float(re.sub(r"[^\d.]", "", price_text))
+    except ValueError:
+        return None
+
+
+def _write_batch(db: Session, store: Store, batch: list[tuple[str, str, float]], cache: HttpCache) -> int:
+    """Upsert (url, name, price_eur) rows and commit; synchronous so no transaction spans an await."""
+    for url, name, price_eur in batch:
+        size_ml_g, unit_hint, _fat = parse_size_and_fat(name)
+        unit_price = unit_price_eur(price_eur, size_ml_g, unit_hint)
+
+        item = db.query(StoreItem).filter_by(store_id=store.id, url=url).one_or_none()
+        if not item:
+            item = StoreItem(
+                store_id=store.id,
+                external_id=url[-64:],
+                raw_name=name,
+                raw_size=None,
+                url=url,
+                **item_attributes(name)
+            )
+            db.add(item)
+            db.flush()
+
+        # Same-day upsert logic
+        existing = (
+            db.query(Price)
+            .filter(
+                Price.store_item_id == item.id,
+                func.date(Price.collected_at) == date.today().isoformat()
+            )
+            .first()
+        )
+
+        if existing:
+            if abs(existing.price_eur - price_eur) > 1e-4 or existing.unit_price != unit_price:
+                existing.price_eur = price_eur
+                existing.unit_price = unit_price
+                existing.collected_at = datetime.utcnow()
+        else:
+            db.add(Price(
+                store_item_id=item.id,
+                store_id=store.id,
+                price_eur=price_eur,
+                unit_price=unit_price,
+                collected_at=datetime.utcnow()
+            ))
+    db.commit()
+    for url, _name, _price in batch:
+        cache.mark_processed(url)
+    return len(batch)
+
+
 async def crawl_maxi(db: Session, city: str | None = None) -> int:
     """
     Crawl Maxi's website for dairy products (Bulmet) and store their prices.
@@ -58,85 +137,60 @@ async def crawl_maxi(db: Session, city: str | None = None) -> int:
         db.refresh(store)
 
     processed_count = 0
+    skipped_count = 0
     seen_products: set[str] = set()
 
-    async with httpx.AsyncClient(base_url=BASE, headers=HEADERS, follow_redirects=True) as client:
+    limiter = HostRateLimiter(MAXI_RPS)
+    limits = httpx.Limits(max_connections=MAXI_CONCURRENCY, max_keepalive_connections=MAXI_CONCURRENCY)
+    async with httpx.AsyncClient(base_url=BASE, headers=HEADERS, follow_redirects=True, limits=limits) as client:
         product_urls: list[str] = []
         for path in LISTING_PATHS:
             page = 1
             while True:
                 url = f"{path}&page={page}" if page > 1 else path
-                html = await fetch(client, url)
+                html = await fetch(client, url, limiter)
                 if not html: break
-                soup = BeautifulSoup(html, "lxml")
                 found_any = False
-                for a in soup.select('a[href*="/product/"]'):
-                    href = a.get("href")
-                    if not href: continue
-                    full_url = href if href.startswith("http") else f"{BASE}{href}"
+                for full_url in await anyio.to_thread.run_sync(_listing_links, html):
                     if full_url not in seen_products:
                         seen_products.add(full_url)
                         product_urls.append(full_url)
                         found_any = True
                 if not found_any: break
                 page += 1
-        
-        for url in product_urls:
-            html = await fetch(client, url)
-            if not html: continue
-            soup = BeautifulSoup(html, "lxml")
-            title_el = soup.select_one("h4.p-title-main, h4.mb-2.p-title-main")
-            if not title_el: continue
-            name = title_el.get_text(strip=True)
-            price_el = soup.select_one("#main_price")
-            if not price_el: continue
-            price_text = price_el.get_text(strip=True).replace("€", "").replace(",", ".")
-            try:
-                price_eur = float(re.sub(r"[^\d.]", "", price_text))
-            except ValueError:
-                continue
 
-            size_ml_g, unit_hint, _fat = parse_size_and_fat(name)
-            unit_price = unit_price_eur(price_eur, size_ml_g, unit_hint)
-
-            item = db.query(StoreItem).filter_by(store_id=store.id, url=url).one_or_none()
-            if not item:
-                item = StoreItem(
-                    store_id=store.id,
-                    external_id=url[-64:],
-                    raw_name=name,
-                    raw_size=None,
-                    url=url,
-                    category_norm = classify(name),
-                    fat_pct = parse_fat_pct(name)
-                )
-                db.add(item)
-                db.flush()
-
-            # Same-day upsert logic
-            existing = (
-                db.query(Price)
-                .filter(
-                    Price.store_item_id == item.id,
-                    func.date(Price.collected_at) == date.today().isoformat()
-                )
-                .first()
-            )
-            
-            if existing:
-                if abs(existing.price_eur - price_eur) > 1e-4 or existing.unit_price != unit_price:
-                    existing.price_eur = price_eur
-                    existing.unit_price = unit_price
-                    existing.collected_at = datetime.utcnow()
-            else:
-                db.add(Price(
-                    store_item_id=item.id,
-                    store_id=store.id,
-                    price_eur=price_eur,
-                    unit_price=unit_price,
-                    collected_at=datetime.utcnow()
-                ))
-            processed_count += 1
-    db.commit()
-    print(f"[maxi] processed {processed_count} items")
+        sem = asyncio.Semaphore(MAXI_CONCURRENCY)
+
+        cache = HttpCache("maxi")
+
+        async def _detail(url: str) -> tuple[str, tuple[str, float] | None, bool]:
+            async with sem:
+                try:
+                    r = await cache.get(client, url, limiter=limiter, timeout=30)
+                except httpx.RequestError as e:
+                    print(f"[maxi] request failed for {url}: {e}")
+                    return url, None, False
+            if r.status_code != 200:
+                print(f"[maxi] request failed for {url}: HTTP {r.status_code}")
+                return url, None, False
+            if r.unchanged:
+                return url, None, True
+            return url, await anyio.to_thread.run_sync(_parse_product, r.text), False
+
+        # parse results queue up on this task; each batch is written and committed with no
+        # await in between, so the SQLite write lock is never held while other scrapers run
+        batch: list[tuple[str, str, float]] = []
+        for fut in asyncio.as_completed([_detail(u) for u in product_urls]):
+            url, parsed, unchanged = await fut
+            if unchanged:
+                skipped_count += 1
+                continue
+            if not parsed: continue
+            batch.append((url, *parsed))
+            if len(batch) >= MAXI_WRITE_BATCH:
+                processed_count += _write_batch(db, store, batch, cache)
+                batch = []
+        if batch:
+            processed_count += _write_batch(db, store, batch, cache)
+    print(f"[maxi] processed {processed_count} items, {skipped_count} unchanged pages skipped")
     return processed_count
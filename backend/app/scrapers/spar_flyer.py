@@ -5,8 +5,10 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 
 from ..models import Store, StoreItem, Price
-from ..utils.pdf_parser import parse_generic_flyer
-from ..utils.normalize import parse_size_and_fat, unit_price_eur
+from ..utils.pdf_parser import parse_generic_flyer_async
+from ..utils import flyer_registry
+from ..utils.normalize import parse_size_and_fat, unit_price_eur, item_attributes
+from ._http import HttpCache
 
 HOME = "https://spar-kosova.com/"
 
@@ -33,31 +35,50 @@ async def crawl_spar_flyer(db: Session, city: str = "Prishtina"):
         store = Store(name="SPAR (Flyer)", slug="spar-flyer", city=city)
         db.add(store); db.commit(); db.refresh(store)
 
+    cache = HttpCache("spar-flyer")
     async with httpx.AsyncClient(headers={"User-Agent": "kpc/1.0"}) as s:
-        r = await s.get(HOME, timeout=60)
-        r.raise_for_status()
+        r = await cache.get(s, HOME, timeout=60)
+        if r.status_code != 200:
+            raise httpx.HTTPError(f"[spar-flyer] HTTP {r.status_code} for {HOME}")
         pdf_urls = await _find_flyer_pdfs(r.text, HOME)
 
         processed_total = 0
+        skipped = 0
         for pdf_url in pdf_urls:
-            r2 = await s.get(pdf_url, timeout=120)
-            if r2.status_code != 200 or "application/pdf" not in r2.headers.get("content-type", ""):
+            r2 = await cache.get(s, pdf_url, timeout=120)
+            if r2.status_code != 200 or "application/pdf" not in r2.content_type:
                 # Some SPAR pages link to an intermediate page; try to resolve one level deep
-                r_mid = await s.get(pdf_url, timeout=60)
-                soup_mid = BeautifulSoup(r_mid.text, "lxml")
+                soup_mid = BeautifulSoup(r2.text, "lxml")
                 for a in soup_mid.select("a[href$='.pdf']"):
                     pdf_url = str(httpx.URL(pdf_url).join(a.get("href")))
-                    r2 = await s.get(pdf_url, timeout=120)
+                    r2 = await cache.get(s, pdf_url, timeout=120)
                     if r2.status_code == 200:
                         break
 
             if r2.status_code != 200:
                 print(f"[spar-flyer] skip non-200 for {pdf_url}")
                 continue
+            if r2.unchanged:
+                skipped += 1
+                continue
 
-            fd, path = tempfile.mkstemp(suffix=".pdf"); os.write(fd, r2.content); os.close(fd)
-            items, (vfrom, vto) = parse_generic_flyer(path)
-            print(f"[spar-flyer] parsed {len(items)} from {pdf_url}")
+            digest = flyer_registry.content_hash(r2.content)
+            known = flyer_registry.lookup(db, digest)
+            if known is not None and known.items:
+                items, (vfrom, vto) = flyer_registry.parsed_result(known)
+                print(f"[spar-flyer] reusing {len(items)} items of known flyer {digest[:12]} ({pdf_url})")
+            else:
+                fd, path = tempfile.mkstemp(suffix=".pdf"); os.write(fd, r2.content); os.close(fd)
+                try:
+                    items, (vfrom, vto) = await parse_generic_flyer_async(path, "spar_pdf")
+                finally:
+                    os.unlink(path)
+                print(f"[spar-flyer] parsed {len(items)} from {pdf_url}")
+                # an empty parse may be a transient OCR failure; leave it unrecorded so it is retried
+                if items:
+                    flyer_registry.record(db, digest, store_id=store.id, source_url=pdf_url, kind="pdf",
+                                          items=items, valid=(vfrom, vto))
+                    db.commit()
 
             for it in items:
                 name = it["raw_name"]; price = it["price_eur"]
@@ -65,13 +86,15 @@ async def crawl_spar_flyer(db: Session, city: str = "Prishtina"):
 
                 item = db.query(StoreItem).filter_by(store_id=store.id, raw_name=name).one_or_none()
                 if not item:
-                    item = StoreItem(store_id=store.id, external_id=name[:64], raw_name=name, url=pdf_url, category=it.get("category"))
+                    item = StoreItem(store_id=store.id, external_id=name[:64], raw_name=name, url=pdf_url, category=it.get("category"), **item_attributes(name))
                     db.add(item); db.commit(); db.refresh(item)
 
                 up = unit_price_eur(price, size_ml_g, unit_hint)
-                db.add(Price(store_item_id=item.id, price_eur=price, unit_price=up,
+                db.add(Price(store_item_id=item.id, store_id=store.id, price_eur=price, unit_price=up,
                              promo_flag=True, promo_valid_from=vfrom, promo_valid_to=vto, collected_at=datetime.utcnow()))
                 db.commit()
                 processed_total += 1
+            if items:
+                cache.mark_processed(pdf_url)
 
-        print(f"[spar-flyer] processed {processed_total} items")
+        print(f"[spar-flyer] processed {processed_total} items, {skipped} unchanged flyers skipped")
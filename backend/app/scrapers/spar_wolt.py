@@ -2,7 +2,7 @@ import httpx, asyncio
 from bs4 import BeautifulSoup
 from sqlalchemy.orm import Session
 from ..models import Store, StoreItem, Price
-from ..utils.normalize import parse_size_and_fat, unit_price_eur
+from ..utils.normalize import parse_size_and_fat, unit_price_eur, item_attributes
 
 WOLT_VENUE = "https://wolt.com/en/xkx/pristina/venue/spar-te-qafa"
 
@@ -32,7 +32,7 @@ async def crawl_spar_wolt(db: Session, city: str = "Prishtina"):
             urlp = WOLT_VENUE  # one venue link
             item = db.query(StoreItem).filter_by(store_id=store.id, raw_name=name).one_or_none()
             if not item:
-                item = StoreItem(store_id=store.id, external_id=name[:64], raw_name=name, url=urlp)
+                item = StoreItem(store_id=store.id, external_id=name[:64], raw_name=name, url=urlp, **item_attributes(name))
                 db.add(item); db.commit(); db.refresh(item)
             up = unit_price_eur(price, size_ml_g, unit_hint)
             db.add(Price(store_item_id=item.id, price_eur=price, unit_price=up)); db.commit()
@@ -2,7 +2,50 @@
 from __future__ import annotations
 from sqlalchemy.orm import Session
 import anyio
+import httpx
+
+from ..db import SessionLocal
+from ._vivafresh_api import ContractChanged, fetch_rows, load_state
 
 async def crawl_vivafresh(db: Session, city: str = "Prishtina") -> int:
+    # replay the captured product API first; the browser crawl also refreshes the capture
+    state = load_state()
+    if state is not None:
+        try:
+            return await _replay_api(db, city, state)
+        except (ContractChanged, httpx.HTTPError) as e:
+            db.rollback()
+            print(f"[vivafresh] api replay failed ({e}); falling back to the browser")
+
+    return await anyio.to_thread.run_sync(_browser_crawl, city)
+
+def _browser_crawl(city: str) -> int:
+    # the worker thread gets its own Session: the caller's may be rolled back and closed
+    # (timeout, cancellation) while this is still running
     from ._playwright_thread import crawl_vivafresh_sync
-    return await anyio.to_thread.run_sync(crawl_vivafresh_sync, db, city)
\ No newline at end of file
+    db = SessionLocal()
+    try:
+        return crawl_vivafresh_sync(db, city)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+async def _replay_api(db: Session, city: str, state: dict) -> int:
+    from ..models import Store
+    from ._playwright_thread import _vf_parse_price, _vf_store_item
+
+    rows = await fetch_rows(state, _vf_parse_price)
+
+    store = db.query(Store).filter_by(slug="vivafresh").one_or_none()
+    if not store:
+        store = Store(name="Viva Fresh", slug="vivafresh", city=city)
+        db.add(store); db.commit(); db.refresh(store)
+
+    for name, price_eur, href in rows:
+        _vf_store_item(db, store, state["base"], name, price_eur, href)
+    db.commit()
+
+    print(f"[vivafresh] api replay processed {len(rows)} items")
+    return len(rows)
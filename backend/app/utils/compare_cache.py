@@ -0,0 +1,117 @@
+# backend/app/utils/compare_cache.py
+# Per-product cache of /compare payloads.
+# Entries are tagged with a generation number; run_all_scrapers bumps it once prices and
+# mappings are committed, which invalidates everything at once. get() returns the generation
+# it looked at and put() drops payloads computed under an older one, so a request that was
+# still running during invalidate() cannot store stale data under the new generation.
+# COMPARE_CACHE picks the backend: "memory" (default, per process), "redis" (shared via
+# REDIS_URL, e.g. between the api and scraper containers) or "off".
+from __future__ import annotations
+
+import logging
+import os
+import threading
+
+from ..config import REDIS_URL
+from ..schemas import CompareOut
+
+logger = logging.getLogger(__name__)
+
+COMPARE_CACHE = os.getenv("COMPARE_CACHE", "memory").lower()
+COMPARE_CACHE_TTL = int(os.getenv("COMPARE_CACHE_TTL", "86400"))  # seconds, redis only
+
+GEN_KEY = "kpc:compare:gen"
+ENTRY_KEY = "kpc:compare:{gen}:{pid}"
+
+_lock = threading.Lock()
+_generation = 0
+_entries: dict[int, tuple[int, CompareOut]] = {}
+_stats = {"hits": 0, "misses": 0, "invalidations": 0, "errors": 0}
+_redis = None
+
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        import redis  # optional at runtime; only needed for COMPARE_CACHE=redis
+        _redis = redis.Redis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+    return _redis
+
+
+def _count(key: str) -> None:
+    with _lock:
+        _stats[key] += 1
+
+
+def generation() -> int:
+    if COMPARE_CACHE == "redis":
+        return int(_get_redis().get(GEN_KEY) or 0)
+    return _generation
+
+
+def get(product_id: int) -> tuple[CompareOut | None, int | None]:
+    """(cached payload or None, generation to pass to put()); generation is None when unknown."""
+    if COMPARE_CACHE == "off":
+        return None, None
+    gen = None
+    try:
+        if COMPARE_CACHE == "redis":
+            gen = generation()
+            raw = _get_redis().get(ENTRY_KEY.format(gen=gen, pid=product_id))
+            hit = CompareOut.model_validate_json(raw) if raw else None
+        else:
+            with _lock:
+                gen = _generation
+                entry = _entries.get(product_id)
+            hit = entry[1] if entry and entry[0] == gen else None
+    except Exception as e:
+        logger.warning("[compare-cache] get failed: %s", e)
+        _count("errors")
+        hit = None
+    _count("hits" if hit is not None else "misses")
+    return hit, gen
+
+
+def put(product_id: int, payload: CompareOut, gen: int | None) -> None:
+    """Store payload computed under generation gen (from get()); dropped if it has moved on."""
+    if COMPARE_CACHE == "off" or gen is None:
+        return
+    try:
+        if COMPARE_CACHE == "redis":
+            if generation() != gen:
+                return
+            # a concurrent invalidate() after this check leaves the entry under the old, unread key
+            key = ENTRY_KEY.format(gen=gen, pid=product_id)
+            _get_redis().set(key, payload.model_dump_json(), ex=COMPARE_CACHE_TTL)
+        else:
+            with _lock:
+                if gen == _generation:
+                    _entries[product_id] = (gen, payload)
+    except Exception as e:
+        logger.warning("[compare-cache] put failed: %s", e)
+        _count("errors")
+
+
+def invalidate() -> None:
+    """Start a new generation; call after a scrape/match pass has committed."""
+    global _generation
+    with _lock:
+        _generation += 1
+        _entries.clear()
+        _stats["invalidations"] += 1
+    if COMPARE_CACHE == "redis":
+        try:
+            _get_redis().incr(GEN_KEY)
+        except Exception as e:
+            logger.warning("[compare-cache] invalidate failed: %s", e)
+            _count("errors")
+
+
+def stats() -> dict:
+    with _lock:
+        out = dict(_stats)
+        out["entries"] = len(_entries)
+    looked_up = out["hits"] + out["misses"]
+    out["hit_rate"] = round(out["hits"] / looked_up, 3) if looked_up else None
+    out["backend"] = COMPARE_CACHE
+    return out
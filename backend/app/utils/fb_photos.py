@@ -0,0 +1,129 @@
+# backend/app/utils/fb_photos.py
+# Persistent photo-id -> publish-epoch store (models.FbPhoto) for the Facebook scrapers.
+# A photo's timestamp never changes, so recency filtering only has to load a photo page the
+# first time a photo is seen. Lookups open their own short sessions because they come from the
+# httpx crawl and from Playwright pool threads; an in-process memo saves repeat lookups. New
+# timestamps are only queued, per slug: flush_pending() writes a crawl's own entries
+# through its Session, so no SQLite write happens on the event loop outside the crawl's write
+# batches; after a rollback the crawl hands them back with requeue_pending().
+# The same rows are the processed-photo ledger: crawl_facebook_flyer records each photo's
+# outcome (items / greeting / banner / app-promo / ...) and skips known photos on later runs.
+# Pre-filter verdicts ("pre-*") only count while fresh, so a misjudged flyer gets another look.
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..db import SessionLocal
+from ..models import FbPhoto
+
+logger = logging.getLogger(__name__)
+
+_memo: dict[str, int] = {}
+_pending: dict[Optional[str], dict[str, int]] = {}   # slug -> photo_id -> epoch, not yet stored
+_lock = threading.Lock()
+
+
+def posted_at(photo_id: Optional[str]) -> Optional[int]:
+    """Known publish time (UTC epoch seconds) of a photo, or None."""
+    if not photo_id:
+        return None
+    with _lock:
+        if photo_id in _memo:
+            return _memo[photo_id]
+    db = SessionLocal()
+    try:
+        row = db.get(FbPhoto, photo_id)
+        epoch = row.posted_at if row is not None else None
+    except SQLAlchemyError as e:
+        logger.warning("[fb-photos] lookup failed: %s", e)
+        return None
+    finally:
+        db.close()
+    if epoch is not None:
+        with _lock:
+            _memo[photo_id] = epoch
+    return epoch
+
+
+def remember_posted_at(photo_id: Optional[str], epoch: Optional[int], slug: Optional[str] = None) -> None:
+    """Memoize a publish time and queue it for the next flush_pending()."""
+    if not photo_id or epoch is None:
+        return
+    epoch = int(epoch)
+    with _lock:
+        if _memo.get(photo_id) == epoch:
+            return
+        _memo[photo_id] = epoch
+        _pending.setdefault(slug, {})[photo_id] = epoch
+
+
+def requeue_pending(flushed: dict[Optional[str], dict[str, int]]) -> None:
+    """Put back what flush_pending() returned when its commit failed (newer queued values win)."""
+    with _lock:
+        for slug, entries in flushed.items():
+            queue = _pending.setdefault(slug, {})
+            for photo_id, epoch in entries.items():
+                queue.setdefault(photo_id, epoch)
+
+
+def flush_pending(db: Session, *slugs: Optional[str]) -> dict[Optional[str], dict[str, int]]:
+    """
+    Add the publish times queued under these slugs to db and return them (slug -> entries);
+    committed with the caller's next commit. Hand the result to requeue_pending() if that
+    commit is rolled back.
+    """
+    with _lock:
+        flushed = {slug: _pending.pop(slug) for slug in set(slugs) if _pending.get(slug)}
+    if not flushed:
+        return flushed
+    try:
+        for slug, entries in flushed.items():
+            for photo_id, epoch in entries.items():
+                row = db.get(FbPhoto, photo_id) or FbPhoto(photo_id=photo_id)
+                row.posted_at = epoch
+                row.slug = row.slug or slug
+                db.add(row)
+        db.flush()  # so record_processed() in the same batch finds these rows (autoflush is off)
+    except SQLAlchemyError:
+        requeue_pending(flushed)
+        raise
+    return flushed
+
+
+def processed_ids(db: Session, photo_ids, prefilter_max_age: Optional[timedelta] = None) -> set[str]:
+    """
+    The subset of photo_ids already processed (ledger rows with processed_at set).
+    Pre-filter rejections count only if younger than prefilter_max_age; None ignores them all.
+    """
+    ids = {p for p in photo_ids if p}
+    if not ids:
+        return set()
+    settled = [FbPhoto.outcome.is_(None), FbPhoto.outcome.not_like("pre-%")]
+    if prefilter_max_age is not None:
+        settled.append(FbPhoto.processed_at >= datetime.utcnow() - prefilter_max_age)
+    rows = db.execute(
+        select(FbPhoto.photo_id).where(
+            FbPhoto.photo_id.in_(ids), FbPhoto.processed_at.is_not(None), or_(*settled),
+        )
+    )
+    return set(rows.scalars())
+
+
+def record_processed(db: Session, photo_id: Optional[str], *, slug: Optional[str], outcome: str,
+                     n_items: int = 0) -> None:
+    """Mark a photo processed with its parse outcome; committed with the caller's next commit."""
+    if not photo_id:
+        return
+    row = db.get(FbPhoto, photo_id) or FbPhoto(photo_id=photo_id)
+    row.slug = row.slug or slug
+    row.outcome = outcome
+    row.n_items = n_items
+    row.processed_at = datetime.utcnow()
+    db.add(row)
@@ -0,0 +1,172 @@
+# backend/app/utils/flyer_layout.py
+# Layout-aware flyer parsing from word boxes (PDF text layer or tesseract image_to_data).
+# Words -> lines -> horizontal segments (split on wide gaps, so columns stay apart) ->
+# price segments and name tiles; every price is paired with the nearest name tile above it
+# or to its left. One pass over the words per page, no regex re-scanning of whole lines.
+from __future__ import annotations
+
+import re
+from statistics import median
+from typing import Dict, List, Optional
+
+from .taxonomy import detect_brand, detect_category
+
+# a standalone price: 1,29 / 1.29€ / €0.99 / 1 29 € / 9€ ; bare integers are sizes, not prices
+PRICE_TOKEN_RE = re.compile(
+    r"^(?:€|eur|euro)?\s*(\d{1,3})(?:[.,\s](\d{2}))?\s*(€|eur|euro)?$", re.I
+)
+DATE_TOKEN_RE = re.compile(r"\d{1,2}[./-]\d{1,2}(?:[./-]\d{2,4})?")
+LETTERS_RE = re.compile(r"[^\W\d_]")
+
+Word = Dict  # {"text", "x0", "top", "x1", "bottom"}
+
+
+def _price_value(text: str) -> Optional[float]:
+    m = PRICE_TOKEN_RE.match(text.strip())
+    if not m or not (m.group(2) or m.group(3)):
+        return None
+    return float(f"{m.group(1)}.{m.group(2) or '00'}")
+
+
+def _box(words: List[Word]) -> Dict:
+    return {
+        "text": " ".join(w["text"] for w in words),
+        "x0": min(w["x0"] for w in words),
+        "top": min(w["top"] for w in words),
+        "x1": max(w["x1"] for w in words),
+        "bottom": max(w["bottom"] for w in words),
+    }
+
+
+def group_lines(words: List[Word]) -> List[List[Word]]:
+    """Words grouped into visual lines (top to bottom), each line sorted left to right."""
+    words = [w for w in words if str(w.get("text", "")).strip()]
+    if not words:
+        return []
+    h = median(w["bottom"] - w["top"] for w in words) or 1.0
+    lines: List[List[Word]] = []
+    for w in sorted(words, key=lambda w: (w["top"] + w["bottom"]) / 2):
+        mid = (w["top"] + w["bottom"]) / 2
+        if lines:
+            last = lines[-1]
+            last_mid = sum((x["top"] + x["bottom"]) / 2 for x in last) / len(last)
+            if abs(mid - last_mid) <= 0.5 * h:
+                last.append(w)
+                continue
+        lines.append([w])
+    return [sorted(line, key=lambda w: w["x0"]) for line in lines]
+
+
+def words_to_text(words: List[Word]) -> str:
+    """Plain text in reading order, for filters and line-based fallbacks."""
+    return "\n".join(" ".join(w["text"] for w in line) for line in group_lines(words))
+
+
+def _segments(line: List[Word], gap: float) -> List[Dict]:
+    """Split a line on wide gaps, then peel a trailing price off each piece."""
+    pieces: List[List[Word]] = [[line[0]]]
+    for w in line[1:]:
+        if w["x0"] - pieces[-1][-1]["x1"] > gap:
+            pieces.append([w])
+        else:
+            pieces[-1].append(w)
+
+    out: List[Dict] = []
+    for piece in pieces:
+        # the longest run of trailing words (max 3: "1", "29", "€") that reads as a price
+        split = None
+        for k in range(min(3, len(piece)), 0, -1):
+            value = _price_value(" ".join(w["text"] for w in piece[-k:]))
+            if value is not None:
+                split = (k, value)
+                break
+        if split:
+            k, value = split
+            if len(piece) > k:
+                # a name with its price on the same line is a row of its own, never stacked
+                out.append({**_box(piece[:-k]), "price": None, "row": True})
+            out.append({**_box(piece[-k:]), "price": value, "row": True})
+        else:
+            out.append({**_box(piece), "price": None, "row": False})
+    return out
+
+
+def _is_name(seg: Dict) -> bool:
+    text = seg["text"]
+    if DATE_TOKEN_RE.search(text) and len(LETTERS_RE.findall(text)) < 3:
+        return False
+    return len(LETTERS_RE.findall(text)) >= 3
+
+
+def _tiles(segs: List[Dict], h: float) -> List[Dict]:
+    """
+    Stack vertically adjacent segments of the same column into one tile. Only name-like
+    segments start a tile; short ones ("1L", "500g") can still extend the tile above.
+    """
+    tiles: List[Dict] = []
+    for seg in sorted(segs, key=lambda s: (s["top"], s["x0"])):
+        if seg["row"]:
+            if _is_name(seg):
+                tiles.append(dict(seg))
+            continue
+        for t in tiles:
+            if t["row"]:
+                continue
+            overlap = min(t["x1"], seg["x1"]) - max(t["x0"], seg["x0"])
+            narrower = min(t["x1"] - t["x0"], seg["x1"] - seg["x0"]) or 1.0
+            if overlap >= 0.5 * narrower and 0 <= seg["top"] - t["bottom"] <= 0.8 * h:
+                t["text"] += " " + seg["text"]
+                t["x0"], t["x1"] = min(t["x0"], seg["x0"]), max(t["x1"], seg["x1"])
+                t["bottom"] = max(t["bottom"], seg["bottom"])
+                break
+        else:
+            if _is_name(seg):
+                tiles.append(dict(seg))
+    return tiles
+
+
+def _distance(name: Dict, price: Dict, h: float) -> Optional[float]:
+    """How far a price sits from a name tile, if it is left of it or below it."""
+    v_overlap = min(name["bottom"], price["bottom"]) - max(name["top"], price["top"])
+    if v_overlap > 0 and name["x1"] <= price["x0"] + h:
+        return max(0.0, price["x0"] - name["x1"])            # same line, to the right
+    h_overlap = min(name["x1"], price["x1"]) - max(name["x0"], price["x0"])
+    if name["bottom"] <= price["top"] + 0.5 * h and h_overlap > 0:
+        cx = abs((name["x0"] + name["x1"]) / 2 - (price["x0"] + price["x1"]) / 2)
+        return max(0.0, price["top"] - name["bottom"]) + 0.5 * cx   # below the name
+    return None
+
+
+def parse_words_for_items(words: List[Word]) -> List[Dict]:
+    """Items ({raw_name, price_eur, brand, category}) from one page of word boxes."""
+    lines = group_lines(words)
+    if not lines:
+        return []
+    h = median(w["bottom"] - w["top"] for line in lines for w in line) or 1.0
+
+    segs = [s for line in lines for s in _segments(line, gap=2.0 * h)]
+    prices = [s for s in segs if s["price"] is not None]
+    tiles = _tiles([s for s in segs if s["price"] is None], h)
+
+    # nearest tile within ~6 lines; a tile with several prices (old + promo) keeps the lowest
+    best: Dict[int, float] = {}
+    for p in prices:
+        scored = [(d, i) for i, t in enumerate(tiles) if (d := _distance(t, p, h)) is not None and d <= 6 * h]
+        if not scored:
+            continue
+        _, i = min(scored)
+        if i not in best or p["price"] < best[i]:
+            best[i] = p["price"]
+
+    items = []
+    for i, price in best.items():
+        name = " ".join(tiles[i]["text"].split()).strip(" :-•–—")
+        if len(name) < 3 or price <= 0:
+            continue
+        items.append({
+            "raw_name": name,
+            "price_eur": price,
+            "brand": detect_brand(name),
+            "category": detect_category(name),
+        })
+    return items
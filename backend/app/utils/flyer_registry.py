@@ -0,0 +1,58 @@
+# backend/app/utils/flyer_registry.py
+# Content-hash registry of processed flyers (models.Flyer). A flyer is usually valid for a
+# week and re-found on every run; looking up its SHA-256 lets scrapers reuse the stored
+# items and validity dates instead of rasterizing and OCR-ing it again.
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..models import Flyer
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def lookup(db: Session, sha256: str) -> Optional[Flyer]:
+    return db.get(Flyer, sha256)
+
+
+def parsed_result(flyer: Flyer) -> Tuple[List[Dict], Tuple[Optional[datetime], Optional[datetime]]]:
+    """Same shape as parse_text_for_items() / parse_generic_flyer()."""
+    return list(flyer.items or []), (flyer.valid_from, flyer.valid_to)
+
+
+def record(
+    db: Session,
+    sha256: str,
+    *,
+    store_id: Optional[int],
+    source_url: Optional[str],
+    kind: str,
+    items: List[Dict] | None = None,
+    valid: Tuple[Optional[datetime], Optional[datetime]] = (None, None),
+    status: str = "parsed",
+) -> Flyer:
+    """Insert or replace the registry row; committed with the caller's next commit."""
+    flyer = db.get(Flyer, sha256) or Flyer(sha256=sha256)
+    flyer.store_id = store_id
+    flyer.source_url = (source_url or "")[:1024] or None
+    flyer.kind = kind
+    flyer.status = status
+    flyer.items = [dict(it) for it in (items or [])]
+    flyer.valid_from, flyer.valid_to = valid
+    flyer.processed_at = datetime.utcnow()
+    db.add(flyer)
+    return flyer
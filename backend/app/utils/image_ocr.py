@@ -1,12 +1,22 @@
 # backend/app/utils/image_ocr.py
 
+import asyncio
 import cv2
 import numpy as np
 from PIL import Image
 import pytesseract
+import anyio
+import multiprocessing
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dotenv import load_dotenv
 
+from . import ocr_cache
+from .image_prefilter import glyph_boxes
+from .ocr_profiles import OcrProfile, get_profile
+
 # --- ADD THIS BLOCK ---
 # Load environment variables from .env file
 load_dotenv()
@@ -16,38 +26,180 @@ if tess_cmd:
     pytesseract.pytesseract.tesseract_cmd = tess_cmd
 # --- END OF BLOCK ---
 
+# processes used to OCR flyer pages in parallel; 1 = OCR inline in the calling thread
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 1)))
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _text_box(boxes: np.ndarray, shape, margin: float):
+    """Bounding box (x0, y0, x1, y1) of the glyphs plus margin, clipped to the image."""
+    h_img, w_img = shape
+    x0 = max(0, int(boxes[:, 0].min() - margin))
+    y0 = max(0, int(boxes[:, 1].min() - margin))
+    x1 = min(w_img, int((boxes[:, 0] + boxes[:, 2]).max() + margin))
+    y1 = min(h_img, int((boxes[:, 1] + boxes[:, 3]).max() + margin))
+    return x0, y0, x1, y1
+
+def _preprocess_for_ocr(img: Image.Image, profile: OcrProfile | None = None) -> Image.Image:
+    profile = profile or get_profile("default")
+    # to OpenCV for basic cleanup; PDF pages are rendered grayscale already
+    if img.mode == "L":
+        gray = np.asarray(img)
+    else:
+        gray = cv2.cvtColor(np.asarray(img.convert("RGB")), cv2.COLOR_RGB2GRAY)
+
+    scale = profile.max_scale
+    if profile.crop or profile.target_text_px:
+        # measure on a copy of at most ~1600px; boxes are scaled back to full resolution
+        f = min(1.0, 1600 / max(gray.shape))
+        small = gray if f == 1.0 else cv2.resize(gray, None, fx=f, fy=f, interpolation=cv2.INTER_AREA)
+        boxes = glyph_boxes(small) / f
+        if len(boxes) >= 10:
+            text_h = float(np.median(boxes[:, 3]))
+            if profile.crop:
+                x0, y0, x1, y1 = _text_box(boxes, gray.shape, margin=2 * text_h)
+                gray = gray[y0:y1, x0:x1]
+            if profile.target_text_px:
+                # no upscale when the text is already tall enough for Tesseract
+                scale = min(profile.max_scale, max(1.0, profile.target_text_px / text_h))
 
-def _preprocess_for_ocr(img: Image.Image) -> Image.Image:
-    # to OpenCV for basic cleanup
-    arr = np.array(img.convert("RGB"))
-    gray = cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY)
     # light denoise + adaptive threshold
-    gray = cv2.medianBlur(gray, 3)
+    if profile.median_blur:
+        gray = cv2.medianBlur(gray, profile.median_blur)
     bw = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                               cv2.THRESH_BINARY, 31, 11)
-    # upscale a bit to help Tesseract
-    bw = cv2.resize(bw, None, fx=1.5, fy=1.5, interpolation=cv2.INTER_CUBIC)
+                               cv2.THRESH_BINARY, profile.block_size, profile.c)
+    # upscale to help Tesseract
+    if scale > 1.0:
+        bw = cv2.resize(bw, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
     return Image.fromarray(bw)
 
-def ocr_image_to_text(img_or_path) -> str:
+def _load_for_ocr(img_or_path, profile: OcrProfile | None = None) -> Image.Image:
+    if isinstance(img_or_path, Image.Image):
+        img = img_or_path
+    else:
+        img = Image.open(str(img_or_path))
+
     try:
-        if isinstance(img_or_path, Image.Image):
-            img = img_or_path
-        else:
-            img = Image.open(str(img_or_path))
+        img = _preprocess_for_ocr(img, profile)
+    except Exception:
+        pass
+    return img
 
-        try:
-            from PIL import ImageOps
-            img = _preprocess_for_ocr(img)
-        except Exception:
-            pass
+def ocr_image_to_text(img_or_path, profile: str = "default") -> str:
+    try:
+        img = _load_for_ocr(img_or_path, get_profile(profile))
+        key = ocr_cache.image_key(img, f"text|{profile}|sqi+eng|--psm 6 --oem 3")
+        cached = ocr_cache.get(key)
+        if cached is not None:
+            return cached
 
         try:
             # psm 6 = assume a block of text, OEM 3 = default LSTM
-            return pytesseract.image_to_string(
+            text = pytesseract.image_to_string(
                 img, lang="sqi+eng", config="--psm 6 --oem 3"
             )
         except Exception:
-            return pytesseract.image_to_string(img, lang="eng", config="--psm 6 --oem 3")
+            text = pytesseract.image_to_string(img, lang="eng", config="--psm 6 --oem 3")
+        ocr_cache.put(key, text)
+        return text
+    except Exception:
+        return ""
+
+def ocr_image_to_words(img_or_path, profile: str = "default") -> list[dict]:
+    """Recognized words with boxes ({text, x0, top, x1, bottom}) for layout parsing."""
+    try:
+        img = _load_for_ocr(img_or_path, get_profile(profile))
+        key = ocr_cache.image_key(img, f"words|{profile}|sqi+eng|--psm 11 --oem 3")
+        cached = ocr_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # psm 11 = sparse text: flyers are tiles of text, not one block
+        try:
+            data = pytesseract.image_to_data(
+                img, lang="sqi+eng", config="--psm 11 --oem 3", output_type=pytesseract.Output.DICT
+            )
+        except Exception:
+            data = pytesseract.image_to_data(
+                img, lang="eng", config="--psm 11 --oem 3", output_type=pytesseract.Output.DICT
+            )
     except Exception:
-        return ""
\ No newline at end of file
+        return []
+
+    words = []
+    for text, conf, x, y, w, h in zip(data["text"], data["conf"], data["left"],
+                                      data["top"], data["width"], data["height"]):
+        if not str(text).strip() or float(conf) < 0:
+            continue
+        words.append({"text": str(text).strip(), "x0": x, "top": y, "x1": x + w, "bottom": y + h})
+    ocr_cache.put(key, words)
+    return words
+
+
+def ocr_probe_text(img_or_path, max_side: int = 1000) -> str:
+    """Quick low-resolution pass (grayscale, no cleanup/upscale) to judge if full OCR is worth it."""
+    try:
+        img = img_or_path if isinstance(img_or_path, Image.Image) else Image.open(str(img_or_path))
+        img = img.convert("L")
+        img.thumbnail((max_side, max_side))
+        key = ocr_cache.image_key(img, "probe|sqi+eng|--psm 11 --oem 3")
+        cached = ocr_cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            text = pytesseract.image_to_string(img, lang="sqi+eng", config="--psm 11 --oem 3")
+        except Exception:
+            text = pytesseract.image_to_string(img, lang="eng", config="--psm 11 --oem 3")
+        ocr_cache.put(key, text)
+        return text
+    except Exception:
+        return ""
+
+
+def _init_ocr_worker() -> None:
+    # one tesseract thread per worker process; the pool provides the parallelism
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def get_ocr_pool() -> ProcessPoolExecutor | None:
+    """Shared OCR process pool (created on first use), or None when OCR_WORKERS <= 1."""
+    global _pool
+    if OCR_WORKERS <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the app process has live threads (event loop, browser pool, DB)
+            # and forking it can copy a held lock into the child
+            _pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, initializer=_init_ocr_worker,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def run_on_ocr_pool(fn, args: list) -> list:
+    """fn(arg) for each arg on the OCR pool (inline when there is none); results in input order."""
+    global _pool
+    pool = get_ocr_pool()
+    if pool is None or len(args) < 2:
+        return [fn(a) for a in args]
+    try:
+        return list(pool.map(fn, args))
+    except BrokenProcessPool:
+        with _pool_lock:
+            _pool = None
+        return [fn(a) for a in args]
+
+
+async def run_on_ocr_pool_async(fn, *args):
+    """Await fn(*args) on the OCR pool (a worker thread when there is none)."""
+    global _pool
+    pool = get_ocr_pool()
+    if pool is not None:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            with _pool_lock:
+                _pool = None
+    return await anyio.to_thread.run_sync(fn, *args)
@@ -1,4 +1,9 @@
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from sqlalchemy import delete, tuple_
 from sqlalchemy.orm import Session
+from ..db import dialect_insert
 from ..models import Product, StoreItem, Mapping
 
 # Defensive matching gates to improve accuracy
@@ -9,6 +14,9 @@ AL_TOKENS = {
     "cheese": {"djath", "djathë", "feta", "white cheese", "sir", "kackavall", "kačkavalj"},
 }
 
+# rows per multi-VALUES statement; 3 params/row keeps us under SQLite's 999 bind limit
+MAPPING_CHUNK = 300
+
 NEGATIVE_BY_CATEGORY = {
     "milk": AL_TOKENS["yogurt"] | {"kefir", "ajke", "cream"},
     "yogurt": AL_TOKENS["milk"],
@@ -61,16 +69,168 @@ def score_item_against_product(item_name: str, product: Product) -> float:
 
     return min(score, 1.0)
 
+def _chunks(rows: list, size: int) -> Iterator[list]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+def write_mappings(
+    db: Session,
+    rows: Iterable[tuple[int, int, float]],
+    threshold: float = 0.7,
+    update_scores: bool = False,
+    prune: bool = False,
+    chunk_size: int = MAPPING_CHUNK,
+) -> tuple[int, int]:
+    """
+    Bulk writer for (product_id, store_item_id, score) rows.
+    Rows at/above threshold are inserted in chunked ON CONFLICT statements against
+    UniqueConstraint(product_id, store_item_id); update_scores also refreshes changed scores.
+    With prune, mappings whose row fell below threshold are deleted.
+    Returns (rows written, rows deleted).
+    """
+    keep: list[dict] = []
+    drop: list[tuple[int, int]] = []
+    for pid, sid, score in rows:
+        if score >= threshold:
+            keep.append({"product_id": pid, "store_item_id": sid, "match_score": score})
+        else:
+            drop.append((pid, sid))
+
+    insert = dialect_insert(db.get_bind().dialect.name)
+    written = 0
+    for chunk in _chunks(keep, chunk_size):
+        if insert is None:
+            written += _write_mappings_orm(db, chunk, update_scores)
+            continue
+        stmt = insert(Mapping).values(chunk)
+        if update_scores:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["product_id", "store_item_id"],
+                set_={"match_score": stmt.excluded.match_score},
+                where=Mapping.match_score != stmt.excluded.match_score,
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=["product_id", "store_item_id"])
+        written += db.execute(stmt).rowcount or 0
+
+    deleted = 0
+    if prune:
+        for chunk in _chunks(drop, chunk_size):
+            res = db.execute(delete(Mapping).where(tuple_(Mapping.product_id, Mapping.store_item_id).in_(chunk)))
+            deleted += res.rowcount or 0
+    return written, deleted
+
+def _write_mappings_orm(db: Session, chunk: list[dict], update_scores: bool) -> int:
+    """Fallback for dialects without ON CONFLICT: one SELECT per chunk, then ORM adds/updates."""
+    pairs = [(r["product_id"], r["store_item_id"]) for r in chunk]
+    existing = {
+        (m.product_id, m.store_item_id): m
+        for m in db.query(Mapping).filter(tuple_(Mapping.product_id, Mapping.store_item_id).in_(pairs))
+    }
+    written = 0
+    for r in chunk:
+        m = existing.get((r["product_id"], r["store_item_id"]))
+        if m is None:
+            db.add(Mapping(**r))
+            written += 1
+        elif update_scores and m.match_score != r["match_score"]:
+            m.match_score = r["match_score"]
+            written += 1
+    db.flush()
+    return written
+
 def ensure_mapping(db: Session, product: Product, item: StoreItem, score: float, threshold: float = 0.7):
-    existing = db.query(Mapping).filter_by(product_id=product.id, store_item_id=item.id).one_or_none()
-    if score >= threshold:
-        if not existing:
-            db.add(Mapping(product_id=product.id, store_item_id=item.id, match_score=score))
-        # Optional: Update score if it has changed significantly
-        # elif existing.match_score != score:
-        #     existing.match_score = score
-    else:
-        # If score drops below threshold, you might want to remove an existing mapping
-        # if existing:
-        #     db.delete(existing)
-        pass
+    """Single-pair convenience wrapper around write_mappings()."""
+    write_mappings(db, [(product.id, item.id, score)], threshold=threshold)
+
+def index_products(products: Iterable[Product]) -> tuple[dict[str, list[Product]], list[Product]]:
+    """
+    Inverted index over the catalog: gated category -> products.
+    Products whose category has no AL_TOKENS gate can match any item, so they go in the open list.
+    """
+    by_cat: dict[str, list[Product]] = {}
+    open_list: list[Product] = []
+    for p in products:
+        if p.category in AL_TOKENS:
+            by_cat.setdefault(p.category, []).append(p)
+        else:
+            open_list.append(p)
+    return by_cat, open_list
+
+def candidate_products(item_name: str, by_cat: dict[str, list[Product]], open_list: list[Product]) -> list[Product]:
+    """Only products whose category tokens appear in the name can score above zero."""
+    name = normalize(item_name)
+    out = list(open_list)
+    for cat, prods in by_cat.items():
+        if has_any(name, AL_TOKENS[cat]):
+            out.extend(prods)
+    return out
+
+def score_items(
+    items: Iterable[StoreItem],
+    products: list[Product],
+    existing: dict[int, set[int]],
+    rescore_existing: bool = False,
+) -> Iterator[tuple[int, int, float]]:
+    """
+    Yield (product_id, store_item_id, score) for candidate pairs from the category index.
+    Already-mapped pairs are skipped unless rescore_existing; then existing mappings to
+    products that are no longer candidates are yielded with a 0.0 score.
+    """
+    by_cat, open_list = index_products(products)
+    product_ids = {p.id for p in products}
+    for it in items:
+        mapped = existing.get(it.id, set())
+        scored: set[int] = set()
+        for p in candidate_products(it.raw_name, by_cat, open_list):
+            if p.id in mapped and not rescore_existing:
+                continue
+            scored.add(p.id)
+            yield p.id, it.id, score_item_against_product(it.raw_name, p)
+        if rescore_existing:
+            for pid in (mapped & product_ids) - scored:
+                yield pid, it.id, 0.0
+
+def match_items(
+    db: Session,
+    items: Iterable[StoreItem],
+    products: Iterable[Product],
+    threshold: float = 0.7,
+    update_scores: bool = False,
+    prune: bool = False,
+) -> tuple[int, int]:
+    """
+    Score items against the catalog via the category index and bulk-write the mappings.
+    Existing mappings are loaded once up front instead of one SELECT per pair.
+    Returns (mappings written, mappings deleted).
+    """
+    existing: dict[int, set[int]] = {}
+    for pid, sid in db.query(Mapping.product_id, Mapping.store_item_id).all():
+        existing.setdefault(sid, set()).add(pid)
+
+    rows = score_items(items, list(products), existing, rescore_existing=update_scores or prune)
+    return write_mappings(db, rows, threshold=threshold, update_scores=update_scores, prune=prune)
+
+def match_pending(db: Session, threshold: float = 0.7, update_scores: bool = False, prune: bool = False) -> tuple[int, int]:
+    """
+    Incremental pass driven by the matched_at watermarks:
+    new/renamed items are scored against every product, new/changed products against the
+    already-matched items. Both sets are stamped afterwards. Returns (written, deleted).
+    """
+    now = datetime.utcnow()
+    products = db.query(Product).all()
+    new_products = [p for p in products if p.matched_at is None]
+    pending_items = db.query(StoreItem).filter(StoreItem.matched_at.is_(None)).all()
+
+    written, deleted = match_items(db, pending_items, products, threshold, update_scores, prune)
+    if new_products:
+        # id + name rows are enough to score, no need to hydrate full StoreItems
+        matched_items = db.query(StoreItem.id, StoreItem.raw_name).filter(StoreItem.matched_at.isnot(None)).all()
+        w, d = match_items(db, matched_items, new_products, threshold, update_scores, prune)
+        written += w; deleted += d
+
+    for it in pending_items:
+        it.matched_at = now
+    for p in new_products:
+        p.matched_at = now
+    return written, deleted
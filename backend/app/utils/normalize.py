@@ -4,10 +4,10 @@ import re
 def parse_size_and_fat(text: str):
     t = text.lower().replace(",", ".")
     size, unit, fat = None, None, None
-    m = re.search(r'(\d+(?:\.\d+)?)\s?(l|ml|kg|g)\b', t)
+    m = re.search(r'(\d+(?:\.\d+)?)\s?(l|ml|kg|gr|g)\b', t)
     if m:
         val = float(m.group(1))
-        unit = m.group(2)
+        unit = "g" if m.group(2) == "gr" else m.group(2)
         if unit in ("l", "kg"):
             size = int(val * 1000)
         else:
@@ -62,11 +62,14 @@ def parse_fat_pct(text: str) -> float | None:
 def classify(name: str) -> str:
     """Classifies a product name into a simple category."""
     n = name.lower()
-    if any(k in n for k in ['jogurt','yogurt','joghurt','kos']):
+    # 'kos' only as a word, so "Kosova"/"kokos" don't turn milk into yogurt
+    if any(k in n for k in ['jogurt','yogurt','joghurt']) or re.search(r'\bkos(?:i|it)?\b', n):
         return 'yogurt'
-    if any(k in n for k in ['qumesht','milk','mleko']):
+    if any(k in n for k in ['qum','milk','mleko']):  # 'qum' covers qumesht/qumësht/qumështi
         return 'milk'
-    if any(k in n for k in ['gjalp','butter','margarine']):
+    if 'margarin' in n:  # kept apart so butter comparisons never pick it up
+        return 'margarine'
+    if any(k in n for k in ['gjalp','butter']):
         return 'butter'
     if any(k in n for k in ['djath','kackavall','sir','cheese','feta']):
         return 'cheese'
@@ -74,3 +77,23 @@ def classify(name: str) -> str:
         return 'potato'
     return 'other'
 # --- END ADDITIONS ---
+
+# Plant/goat "milks" that must never stand in for cow's milk
+ALT_MILK_TOKENS = (
+    "soja", "soya", "badem", "almond", "oriz", "rice",
+    "oat", "tersh", "kokos", "coco", "dhie", "goat",
+)
+
+def is_alt_milk(name: str) -> bool:
+    n = name.lower()
+    return any(k in n for k in ALT_MILK_TOKENS)
+
+def item_attributes(name: str) -> dict:
+    """Structured StoreItem columns derived from the raw name once, at ingest time."""
+    size, _unit, _fat = parse_size_and_fat(name)
+    return {
+        "category_norm": classify(name),
+        "fat_pct": parse_fat_pct(name),
+        "size_ml_g": size,
+        "is_alt_milk": is_alt_milk(name),
+    }
@@ -0,0 +1,120 @@
+# backend/app/utils/ocr_cache.py
+# Disk cache of OCR results keyed by a hash of the preprocessed image plus the tesseract
+# config, so the same picture (e.g. one fbcdn image under several URLs) is OCR'd once.
+# Stored in one SQLite file under OCR_CACHE_DIR so the OCR worker processes share it and its
+# hit/miss counters; least-recently-used entries are evicted past OCR_CACHE_MAX_MB.
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+OCR_CACHE = os.getenv("OCR_CACHE", "1") == "1"
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", ".ocr_cache")
+OCR_CACHE_MAX_MB = float(os.getenv("OCR_CACHE_MAX_MB", "200"))
+
+_local = threading.local()
+
+
+def _conn() -> sqlite3.Connection:
+    # one connection per thread and process (the OCR pool forks/spawns workers)
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.pid == os.getpid():
+        return conn
+    os.makedirs(OCR_CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(OCR_CACHE_DIR, "ocr_cache.sqlite"), timeout=30,
+                           isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+        "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access)")
+    conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, n INTEGER NOT NULL)")
+    _local.conn, _local.pid = conn, os.getpid()
+    return conn
+
+
+def _count(conn: sqlite3.Connection, name: str, n: int = 1) -> None:
+    conn.execute(
+        "INSERT INTO stats (name, n) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET n = n + excluded.n",
+        (name, n),
+    )
+
+
+def image_key(img, config: str) -> str:
+    """sha256 over the OCR config, image mode/size and pixel bytes."""
+    h = hashlib.sha256(config.encode())
+    h.update(f"{img.mode}:{img.size}".encode())
+    h.update(img.tobytes())
+    return h.hexdigest()
+
+
+def get(key: str):
+    """Cached value for key, or None on a miss (or when the cache is off/unavailable)."""
+    if not OCR_CACHE:
+        return None
+    try:
+        conn = _conn()
+        row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row:
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        _count(conn, "hits" if row else "misses")
+        return json.loads(row[0]) if row else None
+    except (sqlite3.Error, OSError, ValueError) as e:
+        logger.warning("[ocr-cache] get failed: %s", e)
+        return None
+
+
+def put(key: str, value) -> None:
+    if not OCR_CACHE:
+        return
+    try:
+        conn = _conn()
+        raw = json.dumps(value)
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+            (key, raw, len(raw), time.time()),
+        )
+        _evict(conn)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("[ocr-cache] put failed: %s", e)
+
+
+def _evict(conn: sqlite3.Connection) -> None:
+    limit = int(OCR_CACHE_MAX_MB * 1024 * 1024)
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+    if total <= limit:
+        return
+    # drop least-recently-used rows until back under 90% of the limit
+    dropped = 0
+    for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+        if total <= 0.9 * limit:
+            break
+        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        total -= size
+        dropped += 1
+    _count(conn, "evictions", dropped)
+
+
+def stats() -> dict:
+    out = {"hits": 0, "misses": 0, "evictions": 0, "entries": 0, "bytes": 0, "enabled": OCR_CACHE}
+    if not OCR_CACHE:
+        return out
+    try:
+        conn = _conn()
+        out.update({name: n for name, n in conn.execute("SELECT name, n FROM stats")})
+        out["entries"], out["bytes"] = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+    except sqlite3.Error as e:
+        logger.warning("[ocr-cache] stats failed: %s", e)
+    looked_up = out["hits"] + out["misses"]
+    out["hit_rate"] = round(out["hits"] / looked_up, 3) if looked_up else None
+    return out
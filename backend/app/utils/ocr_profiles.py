@@ -0,0 +1,35 @@
+# backend/app/utils/ocr_profiles.py
+# OCR preprocessing profiles per flyer source. SPAR/ETC PDF pages are rendered at a known DPI
+# and usually have text tall enough for Tesseract, so they are not blindly upscaled; Facebook
+# JPEGs are smaller and noisier. A profile sets the render DPI (PDFs), the glyph height the
+# upscale aims for and the cleanup applied; "default" is the original fixed pipeline.
+# scripts/bench_ocr_profiles.py compares profiles on sample flyers.
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class OcrProfile:
+    name: str
+    dpi: int = 200               # PDF render resolution
+    target_text_px: int = 0      # upscale until the median glyph is this tall; 0 = always max_scale
+    max_scale: float = 1.5
+    median_blur: int = 3         # kernel size, 0 = off
+    block_size: int = 31         # adaptive threshold neighbourhood
+    c: int = 11                  # adaptive threshold offset
+    crop: bool = False           # crop to the bounding box of detected text
+
+
+PROFILES = {
+    "default": OcrProfile("default"),
+    "spar_pdf": OcrProfile("spar_pdf", dpi=200, target_text_px=30, crop=True),
+    # ETC flyers are image-only scans with small print: render finer, blur less
+    "etc_pdf": OcrProfile("etc_pdf", dpi=250, target_text_px=30, median_blur=0, crop=True),
+    # JPEG artefacts need the blur; social-media sizes often need the full upscale
+    "facebook": OcrProfile("facebook", target_text_px=32, max_scale=2.0, block_size=41, crop=True),
+}
+
+
+def get_profile(name: str | None) -> OcrProfile:
+    return PROFILES.get(name or "default", PROFILES["default"])
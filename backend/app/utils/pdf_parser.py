@@ -1,13 +1,21 @@
 from __future__ import annotations
 import os, re
+from functools import partial
+import anyio
 from dotenv import load_dotenv
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime
-from .image_ocr import ocr_image_to_text
+from .image_ocr import ocr_image_to_words, run_on_ocr_pool
+from .ocr_profiles import get_profile
+from .flyer_layout import parse_words_for_items, words_to_text
 from .taxonomy import detect_brand, detect_category  # <-- NEW
 
 load_dotenv()
 
+# digitally produced flyers carry a text layer; pages with less text than this are OCR'd
+PDF_TEXT_LAYER = os.getenv("PDF_TEXT_LAYER", "1") == "1"
+PDF_TEXT_MIN_CHARS = int(os.getenv("PDF_TEXT_MIN_CHARS", "40"))
+
 # match €1,89 / 1.89€ / 1 89 € / 9€ / 9 eur / euro 1 29, etc.
 PRICE_RE = re.compile(
     r"(?:(?:€|eur|euro)\s*)?"                # optional currency before
@@ -34,25 +42,29 @@ def _dedupe(items: List[Dict]) -> List[Dict]:
         seen[key] = it
     return list(seen.values())
 
-def parse_text_for_items(text: str) -> Tuple[List[Dict], Tuple[Optional[datetime], Optional[datetime]]]:
-    """Parses raw text to extract product items and validity dates (now with brand+category)."""
-    items: List[Dict] = []
-    vfrom = vto = None
-
+def _validity(text: str) -> Tuple[Optional[datetime], Optional[datetime]]:
     dates = DATE_RE.findall(text)
     if len(dates) >= 2:
         d1 = _parse_date(dates[0]); d2 = _parse_date(dates[1])
         if d1 and d2:
-            vfrom, vto = (min(d1, d2), max(d1, d2))
+            return (min(d1, d2), max(d1, d2))
+    return None, None
+
+def parse_text_for_items(text: str) -> Tuple[List[Dict], Tuple[Optional[datetime], Optional[datetime]]]:
+    """Parses raw text to extract product items and validity dates (now with brand+category)."""
+    items: List[Dict] = []
+    vfrom, vto = _validity(text)
 
     for line in text.splitlines():
         line_c = " ".join(line.split())
         if not line_c:
             continue
 
-        m = PRICE_RE.search(line_c)
-        if not m:
+        # one scan per line: the first match is the price, all matches are cut from the name
+        matches = list(PRICE_RE.finditer(line_c))
+        if not matches:
             continue
+        m = matches[0]
 
         try:
             # turn "1 29" or "1,29" into "1.29"
@@ -62,7 +74,10 @@ def parse_text_for_items(text: str) -> Tuple[List[Dict], Tuple[Optional[datetime
             continue
 
         # remove the matched price (with currency) from the name
-        name = PRICE_RE.sub("", line_c).strip(" :-•–—")
+        name, pos = "", 0
+        for mm in matches:
+            name += line_c[pos:mm.start()]; pos = mm.end()
+        name = (name + line_c[pos:]).strip(" :-•–—")
         if len(name) < 3:
             continue
 
@@ -75,20 +90,90 @@ def parse_text_for_items(text: str) -> Tuple[List[Dict], Tuple[Optional[datetime
 
     return _dedupe(items), (vfrom, vto)
 
-def parse_generic_flyer(pdf_path: str) -> Tuple[List[Dict], Tuple[Optional[datetime], Optional[datetime]]]:
+def parse_pages_for_items(pages: List[List[Dict]]) -> Tuple[List[Dict], Tuple[Optional[datetime], Optional[datetime]]]:
     """
-    Parses a PDF flyer by converting it to images and running OCR.
-    Validates Poppler path at runtime.
+    Items and validity dates from per-page word boxes: the layout parser pairs prices with
+    name tiles; pages where it finds nothing fall back to the line-based text parser.
     """
+    items: List[Dict] = []
+    texts: List[str] = []
+    for words in pages:
+        text = words_to_text(words)
+        texts.append(text)
+        page_items = parse_words_for_items(words)
+        items.extend(page_items or parse_text_for_items(text)[0])
+    return _dedupe(items), _validity("\n".join(texts))
+
+def _poppler_path() -> str:
     POPPLER_PATH = (os.getenv("POPPLER_PATH") or "").strip().strip('"')
     if not POPPLER_PATH or not os.path.exists(os.path.join(POPPLER_PATH, "pdfinfo.exe")):
         raise RuntimeError(
             f"POPPLER_PATH invalid: {POPPLER_PATH!r}. Expected pdfinfo.exe inside this folder."
         )
+    return POPPLER_PATH
 
-    # Import here so missing Poppler won't crash the whole app at import-time
+def _render_page(pdf_path: str, page_no: int, poppler_path: str, dpi: int = 200):
+    """Rasterize a single page; poppler only renders the requested one."""
     from pdf2image import convert_from_path
+    return convert_from_path(pdf_path, dpi=dpi, first_page=page_no, last_page=page_no,
+                             grayscale=True, poppler_path=poppler_path)[0]
+
+def _ocr_pdf_page(pdf_path: str, poppler_path: str, profile: str, page_no: int) -> List[Dict]:
+    """Render, preprocess and OCR one page to word boxes, then drop it; runs in an OCR pool worker."""
+    img = _render_page(pdf_path, page_no, poppler_path, dpi=get_profile(profile).dpi)
+    try:
+        return ocr_image_to_words(img, profile)
+    finally:
+        img.close()
+
+def _text_layer_pages(pdf_path: str) -> List[Optional[List[Dict]]]:
+    """Per-page word boxes from the PDF text layer; None for pages that need OCR."""
+    import pdfplumber
+
+    out: List[Optional[List[Dict]]] = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            words = [
+                {"text": w["text"], "x0": w["x0"], "top": w["top"], "x1": w["x1"], "bottom": w["bottom"]}
+                for w in page.extract_words()
+            ]
+            text = "".join(w["text"] for w in words)
+            usable = len(text) >= PDF_TEXT_MIN_CHARS and any(c.isdigit() for c in text)
+            out.append(words if usable else None)
+            page.flush_cache()
+    return out
+
+def parse_generic_flyer(pdf_path: str, profile: str = "default") -> Tuple[List[Dict], Tuple[Optional[datetime], Optional[datetime]]]:
+    """
+    Parses a PDF flyer: word boxes come from the text layer where the page has a usable
+    one, otherwise from OCR of the rendered page; see parse_pages_for_items. Poppler is only needed (and validated) when OCR is.
+    profile names the OCR preprocessing profile (render DPI, upscale, crop; see ocr_profiles).
+    Pages are rendered one at a time inside the OCR workers, so at most one page image per
+    worker is alive regardless of page count; text comes back in page order.
+    """
+    pages: List[Optional[List[Dict]]] = []
+    if PDF_TEXT_LAYER:
+        try:
+            pages = _text_layer_pages(pdf_path)
+        except Exception as e:
+            print(f"[pdf] text layer unreadable for {pdf_path}: {e}")
+            pages = []
+
+    if not pages or None in pages:
+        POPPLER_PATH = _poppler_path()
+
+        # Import here so missing Poppler won't crash the whole app at import-time
+        from pdf2image import pdfinfo_from_path
+
+        if not pages:
+            n_pages = int(pdfinfo_from_path(pdf_path, poppler_path=POPPLER_PATH).get("Pages") or 0)
+            pages = [None] * n_pages
+        missing = [i + 1 for i, p in enumerate(pages) if p is None]
+        for page_no, words in zip(missing, run_on_ocr_pool(partial(_ocr_pdf_page, pdf_path, POPPLER_PATH, profile), missing)):
+            pages[page_no - 1] = words
+
+    return parse_pages_for_items(pages)
 
-    pages = convert_from_path(pdf_path, dpi=200, poppler_path=POPPLER_PATH)
-    text = "\n".join(ocr_image_to_text(img) for img in pages)
-    return parse_text_for_items(text)
+async def parse_generic_flyer_async(pdf_path: str, profile: str = "default") -> Tuple[List[Dict], Tuple[Optional[datetime], Optional[datetime]]]:
+    """parse_generic_flyer in a worker thread, so scrapes don't block the event loop."""
+    return await anyio.to_thread.run_sync(parse_generic_flyer, pdf_path, profile)
@@ -15,6 +15,10 @@ def has_column(table, col):
     cur.execute(f"PRAGMA table_info({table});")
     return any(r[1] == col for r in cur.fetchall())
 
+def has_table(table):
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?;", (table,))
+    return cur.fetchone() is not None
+
 def safe_alter(table, col, coldef):
     if not has_column(table, col):
         print(f"Adding {table}.{col} ...")
@@ -25,6 +29,15 @@ def safe_alter(table, col, coldef):
 # Ensure columns exist
 safe_alter("store_items", "product_id", "INTEGER")
 safe_alter("prices", "store_id", "INTEGER")
+safe_alter("store_items", "matched_at", "DATETIME")
+safe_alter("products", "matched_at", "DATETIME")
+safe_alter("store_items", "size_ml_g", "INTEGER")
+safe_alter("store_items", "is_alt_milk", "BOOLEAN")
+# fb_photos is created by create_all; tables from before the processed-photo ledger lack these
+if has_table("fb_photos"):
+    safe_alter("fb_photos", "outcome", "VARCHAR(16)")
+    safe_alter("fb_photos", "n_items", "INTEGER")
+    safe_alter("fb_photos", "processed_at", "DATETIME")
 
 # Backfill prices.store_id from store_items.store_id where missing
 print("Backfilling prices.store_id ...")
@@ -37,6 +50,10 @@ SET store_id = (
 WHERE store_id IS NULL;
 """)
 
+# compare looks mappings up by store item (see latest_prices in models.py)
+cur.execute("CREATE INDEX IF NOT EXISTS ix_mappings_store_item_id ON mappings (store_item_id);")
+cur.execute("CREATE INDEX IF NOT EXISTS ix_store_items_cat_size ON store_items (category_norm, size_ml_g);")
+
 conn.commit()
 
 # Show final columns
@@ -0,0 +1,78 @@
+# backend/scripts/bench_ocr_profiles.py
+# Compare OCR preprocessing profiles on sample flyers: OCR seconds per page and items recovered.
+#
+#   python scripts/bench_ocr_profiles.py flyers/spar.pdf flyers/fb1.jpg --profiles default,spar_pdf,facebook
+#
+# PDFs are rendered with each profile's DPI (needs POPPLER_PATH, like the scrapers); images are
+# OCR'd as-is. The OCR cache is disabled so every run pays for Tesseract.
+import argparse
+import os
+import sys
+import time
+from statistics import mean
+
+os.environ["OCR_CACHE"] = "0"
+
+# Make sure project root is on sys.path so "backend.app..." imports work
+THIS_DIR = os.path.dirname(__file__)
+PROJECT_ROOT = os.path.abspath(os.path.join(THIS_DIR, "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from PIL import Image
+
+from backend.app.utils.image_ocr import ocr_image_to_words
+from backend.app.utils.ocr_profiles import PROFILES, get_profile
+from backend.app.utils.pdf_parser import _poppler_path, _render_page, parse_pages_for_items
+
+
+def _pages(path: str, profile: str):
+    """Page images of a flyer (rendered at the profile's DPI for PDFs)."""
+    if not path.lower().endswith(".pdf"):
+        yield Image.open(path)
+        return
+    from pdf2image import pdfinfo_from_path
+
+    poppler = _poppler_path()
+    n_pages = int(pdfinfo_from_path(path, poppler_path=poppler).get("Pages") or 0)
+    for page_no in range(1, n_pages + 1):
+        yield _render_page(path, page_no, poppler, dpi=get_profile(profile).dpi)
+
+
+def bench(path: str, profile: str) -> dict:
+    seconds, pages = [], []
+    for img in _pages(path, profile):
+        started = time.perf_counter()
+        pages.append(ocr_image_to_words(img, profile))
+        seconds.append(time.perf_counter() - started)
+        img.close()
+    items, _valid = parse_pages_for_items(pages)
+    return {
+        "pages": len(pages),
+        "s_per_page": mean(seconds) if seconds else 0.0,
+        "words": sum(len(p) for p in pages),
+        "items": len(items),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="OCR seconds per page and items recovered per profile.")
+    ap.add_argument("files", nargs="+", help="flyer PDFs or images")
+    ap.add_argument("--profiles", default=",".join(PROFILES), help="comma separated profile names")
+    args = ap.parse_args()
+
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+    unknown = [p for p in profiles if p not in PROFILES]
+    if unknown:
+        ap.error(f"unknown profiles {unknown}; known: {', '.join(PROFILES)}")
+
+    print(f"{'file':40} {'profile':10} {'pages':>5} {'s/page':>8} {'words':>7} {'items':>6}")
+    for path in args.files:
+        for profile in profiles:
+            r = bench(path, profile)
+            print(f"{os.path.basename(path)[:40]:40} {profile:10} {r['pages']:>5} "
+                  f"{r['s_per_page']:>8.2f} {r['words']:>7} {r['items']:>6}")
+
+
+if __name__ == "__main__":
+    main()